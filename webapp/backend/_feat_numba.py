@@ -0,0 +1,49 @@
+"""
+Compiled last-row lag/rolling features for predictor._last_row_features (None without Numba,
+see _numba). Values match predictor._make_lag_roll_features on the last row.
+"""
+
+import numpy as np
+
+from _numba import jit
+
+
+def _last_lag_roll(y, cadence_min, lags_min, roll_wins_min):
+    """
+    y: float64 target series for one sensor, oldest first (NaN where missing).
+    lags_min / roll_wins_min: predictor.LAGS_MIN / ROLL_WINS_MIN, as tuples.
+    Returns the last row's lags, then rolling means, then rolling stds, in that order (with the
+    defaults: lag_1..lag_60, roll_mean_5..roll_mean_60, roll_std_5..roll_std_60); NaN where pandas
+    gives NaN (not enough history, or a NaN inside the window).
+    """
+    n = y.size
+    out = np.full(len(lags_min) + 2 * len(roll_wins_min), np.nan)
+
+    for k, lag_min in enumerate(lags_min):
+        steps = int(lag_min / cadence_min)
+        if steps < n:
+            out[k] = y[n - 1 - steps]
+
+    # rolling over the series shifted by one: the `steps` values before the last row
+    for k, win_min in enumerate(roll_wins_min):
+        steps = int(win_min / cadence_min)
+        if steps < 1 or steps > n - 1:
+            continue
+        lo = n - 1 - steps
+        total = 0.0
+        for i in range(lo, n - 1):
+            total += y[i]
+        if np.isnan(total):
+            continue
+        mean = total / steps
+        out[len(lags_min) + k] = mean
+        if steps > 1:
+            sq = 0.0
+            for i in range(lo, n - 1):
+                sq += (y[i] - mean) ** 2
+            out[len(lags_min) + len(roll_wins_min) + k] = np.sqrt(sq / (steps - 1))
+    return out
+
+
+# nogil lets predictions running in different threadpool workers compute features at the same time
+last_lag_roll = jit(_last_lag_roll, nogil=True)
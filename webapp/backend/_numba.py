@@ -0,0 +1,24 @@
+"""
+Optional Numba support for the compiled kernels (_stats_numba, _feat_numba).
+
+Without numba, or with MESHSTAT_USE_NUMBA=0, jit() returns None and callers keep their
+numpy/pandas path.
+"""
+
+import os
+
+try:
+    from numba import njit
+except ImportError:  # optional dependency
+    njit = None
+
+USE_NUMBA = njit is not None and os.getenv("MESHSTAT_USE_NUMBA", "1") != "0"
+
+
+def jit(fn, **options):
+    """
+    fn compiled with njit, or None when Numba is off. cache=True writes the compiled kernel next to
+    the module, so only the first process after a deploy pays the compile. No fastmath: the kernels'
+    NaN checks need IEEE semantics.
+    """
+    return njit(cache=True, **options)(fn) if USE_NUMBA else None
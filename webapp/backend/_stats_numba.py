@@ -0,0 +1,50 @@
+"""
+Compiled per-metric statistics for /ai/sensor-analysis (None without Numba, see _numba).
+Results match main.py's numpy helpers, including tie order.
+"""
+
+import numpy as np
+
+from _numba import jit
+
+_NAT = np.iinfo(np.int64).min  # DatetimeIndex.asi8 value for NaT
+
+
+def _stats_and_jumps(vals, ts_ns, n_top, n_jumps):
+    """
+    vals: float64 readings (NaN where missing); ts_ns: int64 epoch ns (NaT allowed), same length.
+    Returns (n, mean, min, p50, p90, max, top_idx, jump_from, jump_to, jump_delta):
+      - the stats cover every non-NaN value (NaN stats when there are none)
+      - top_idx: the n_top largest values with a timestamp, largest first
+      - jumps: the n_jumps largest |step| between consecutive timestamped values in time order,
+        ignoring steps between duplicate timestamps; indices point into vals
+    """
+    finite = vals[~np.isnan(vals)]
+    n = finite.size
+    if n:
+        mean = finite.mean()
+        lo = finite.min()
+        hi = finite.max()
+        p50 = np.percentile(finite, 50.0)
+        p90 = np.percentile(finite, 90.0)
+    else:
+        mean = lo = hi = p50 = p90 = np.nan
+
+    empty = np.empty(0, dtype=np.int64)
+    if n_top <= 0 and n_jumps <= 0:
+        return n, mean, lo, p50, p90, hi, empty, empty, empty, np.empty(0, dtype=np.float64)
+
+    ok = np.flatnonzero(~np.isnan(vals) & (ts_ns != _NAT))
+    top_idx = ok[np.argsort(-vals[ok], kind="mergesort")[:n_top]] if n_top > 0 else empty
+
+    if n_jumps <= 0 or ok.size < 2:
+        return n, mean, lo, p50, p90, hi, top_idx, empty, empty, np.empty(0, dtype=np.float64)
+
+    ok = ok[np.argsort(ts_ns[ok], kind="mergesort")]
+    dv = np.diff(vals[ok])
+    step = np.flatnonzero(np.diff(ts_ns[ok]) > 0)
+    jumps = step[np.argsort(-np.abs(dv[step]), kind="mergesort")[:n_jumps]]
+    return n, mean, lo, p50, p90, hi, top_idx, ok[jumps], ok[jumps + 1], dv[jumps]
+
+
+stats_and_jumps = jit(_stats_and_jumps)
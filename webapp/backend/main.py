@@ -1,25 +1,56 @@
+import asyncio
+import heapq
+import logging
+import math
 import os
-from datetime import datetime
-from typing import Any, Dict, List, Optional
-
-from fastapi import FastAPI, HTTPException, Query
-from fastapi.middleware.cors import CORSMiddleware
-from supabase import Client, create_client
-
+import secrets
+import time
+from contextlib import asynccontextmanager
+from functools import lru_cache
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List, Optional, Tuple, Literal
+from typing import Any, Callable, Dict, List, Literal, Optional, Tuple
 from zoneinfo import ZoneInfo
-from fastapi import Query, HTTPException
 
-from pydantic import BaseModel
+import ciso8601
+import httpx
+import orjson
+from cachetools import TTLCache
+from fastapi import Depends, FastAPI, Header, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, Response
+from supabase import AsyncClient, AsyncClientOptions, PostgrestAPIError, acreate_client
 
-from predictor import predict_from_supabase
+import numpy as np
+import pandas as pd
+
+from openai import AsyncOpenAI
+from pydantic import BaseModel, Field
 
 from dotenv import load_dotenv
-load_dotenv() 
+# before the local modules: they read MESHSTAT_* settings at import
+load_dotenv()
+
+from _stats_numba import stats_and_jumps
+from predictor import (
+    FetchedHistory,
+    history_arrays_from_tail,
+    history_rows_needed,
+    history_tail_query,
+    load_bundle_cached,
+    predict_batch_from_arrays,
+    predict_from_arrays,
+    warm_up,
+)
+
 
+# LOG_LEVEL=DEBUG turns on the per-request query logging
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
+logger = logging.getLogger(__name__)
 
 TORONTO_TZ = ZoneInfo("America/Toronto")
+_ONE_HOUR = pd.Timedelta(hours=1)
 
 HEAT_HIGH_C = 31.0   # aligns to Ontario heat-warning daytime criterion
 HEAT_ELEVATED_C = 26.0  # temp-only proxy
@@ -32,8 +63,46 @@ NOISE_NIGHT_VIOLATION_DB = 55.0  # more protective at night
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+# /admin/* routes require it in the X-Admin-Key header; unset, they reject every request
+ADMIN_API_KEY = os.getenv("ADMIN_API_KEY")
 
 TABLE_NAME = "sensor_data_backup"
+LATEST_VIEW_NAME = "sensor_latest"  # sql/002_sensor_latest.sql
+ROW_COLUMNS = "sensor_id,location_name,lat,lon,ts_utc,created_at,average_db,max_db,celsius"
+ROW_FIELDS = frozenset(ROW_COLUMNS.split(","))
+FRAME_COLUMNS = "sensor_id,ts_utc,average_db,celsius"
+
+# dashboard aggregates are served from memory for AGG_CACHE_TTL_S, then served stale
+# (while one background refresh runs) until AGG_CACHE_STALE_S
+AGG_CACHE_TTL_S = 30.0
+AGG_CACHE_STALE_S = 120.0
+
+# Postgres function from sql/001_dashboard_agg.sql
+DASHBOARD_AGG_RPC = "dashboard_agg"
+FETCH_PAGE_ROWS = 1000  # Supabase's default PostgREST max-rows; bigger pages are cut server-side
+
+# /ai/sensor-analysis: below AI_NOTABLE_MIN rows "notable" is left empty; above AI_NOTABLE_MAX only top values are listed
+AI_NOTABLE_MIN = 20
+AI_NOTABLE_MAX = 2000
+
+# system prompt for /ai/sensor-analysis
+AI_INSTRUCTIONS = (
+    "You are MeshStat Assistant, a municipal-style sensor data analyst.\n"
+    "Use only the provided context; do not invent readings or timestamps.\n"
+    "Answer the user's question clearly and compactly.\n"
+    "Output format (plain text, no markdown):\n"
+    "1) One-line title: Sensor + window\n"
+    "2) Summary (3-6 bullets)\n"
+    "3) Notable events (up to 5 bullets; include local timestamps when available)\n"
+    "4) Interpretation + next checks (2-5 bullets)\n"
+    "If data is sparse, say what is missing and what would help."
+    "Use sensor.meta as ground truth for location/context and expectations.\n"
+)
+
+# /ai/sensor-predict*: window searched for the history rows the model features read
+PREDICT_LOOKBACK_HOURS = 72
+# /ai/sensor-predict: identical (sensor, metric, future time) requests reuse a result this long
+PRED_CACHE_TTL_S = 30.0
 
 SENSOR_META = {
     1: {
@@ -94,10 +163,68 @@ class SensorPredictResponse(BaseModel):
     model: str
     note: str
 
+class SensorPredictBatchRequest(BaseModel):
+    sensor_ids: List[int] = Field(min_length=1, max_length=50)
+    metric: Literal["celsius", "average_db"]
+    future_ts_utc: List[datetime] = Field(min_length=1, max_length=200)
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+class SensorPredictBatchItem(BaseModel):
+    sensor_id: int
+    future_ts_utc: str
+    prediction: Optional[float] = None
+    error: Optional[str] = None  # set instead of prediction when this pair cannot be predicted
 
-app = FastAPI()
+class SensorPredictBatchResponse(BaseModel):
+    metric: str
+    unit: str
+    model: str
+    note: str
+    predictions: List[SensorPredictBatchItem]
+
+
+# the one Supabase client, shared by every handler (predictor included); created on startup so it binds to uvicorn's event loop.
+# All PostgREST calls share one pooled HTTP/2 connection set, so TLS setup is paid once per connection.
+supabase_async: AsyncClient
+# likewise one OpenAI client, so its connection pool is reused across AI requests; None without OPENAI_API_KEY
+openai_client: Optional[AsyncOpenAI] = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global supabase_async, openai_client
+    http_client = httpx.AsyncClient(
+        http2=True,
+        timeout=120.0,  # postgrest's default; it is not applied when passing our own client
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
+        follow_redirects=True,
+    )
+    supabase_async = await acreate_client(
+        SUPABASE_URL,
+        SUPABASE_KEY,
+        options=AsyncClientOptions(httpx_client=http_client),
+    )
+    api_key = os.getenv("OPENAI_API_KEY")
+    openai_client = AsyncOpenAI(api_key=api_key) if api_key else None
+
+    # pay the one-time model load and JIT compiles before serving, not on the first request
+    # (separately: a dashboard-only deploy without models still compiles the stats kernel)
+    try:
+        await run_in_threadpool(warm_up, os.getenv("MODELS_DIR", "models"))
+    except Exception:
+        logger.warning("Predictor warm-up failed; the first prediction will pay for it", exc_info=True)
+    if stats_and_jumps is not None:
+        try:
+            stats_and_jumps(np.zeros(2), np.zeros(2, dtype=np.int64), 1, 1)
+        except Exception:
+            logger.warning("Stats kernel warm-up failed; the first sensor analysis will pay for it", exc_info=True)
+    yield
+    await http_client.aclose()
+    if openai_client is not None:
+        await openai_client.close()
+
+
+# orjson keeps encoding of the large /sensor-data/range payloads off the slow path
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -106,29 +233,61 @@ app.add_middleware(
     allow_methods=["GET","POST","PUT","PATCH","DELETE","OPTIONS"],
     allow_headers=["*"],
 )
+# row arrays from /sensor-data/range and /series repeat the same keys on every row and compress
+# several-fold; level 5 keeps most of that ratio at a fraction of the default level's CPU
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
 
 
 def _parse_ts(ts: Optional[str]) -> Optional[datetime]:
     if not ts:
         return None
-    s = ts.replace("Z", "+00:00")
+    return _parse_ts_cached(ts)
+
+# the same ts_utc strings are parsed over and over within (and across) dashboard requests
+@lru_cache(maxsize=65536)
+def _parse_ts_cached(ts: str) -> Optional[datetime]:
     try:
-        dt = datetime.fromisoformat(s)
+        dt = ciso8601.parse_datetime(ts)  # C parser, accepts both "Z" and "+00:00"
     except ValueError:
         return None
 
+    # Fast path: PostgREST sends UTC, which ciso8601 already tags with timezone.utc
+    if dt.tzinfo is timezone.utc:
+        return dt
+
     # If tz is missing, treat it as UTC (your column is ts_utc)
     if dt.tzinfo is None:
-        dt = dt.replace(tzinfo=timezone.utc)
+        return dt.replace(tzinfo=timezone.utc)
 
     # Normalize to UTC
     return dt.astimezone(timezone.utc)
 
+def _rows_frame(rows: List[dict]) -> pd.DataFrame:
+    """Frame of sensor_id/ts_utc/average_db/celsius built once per fetch: UTC `ts`, NaN for missing readings."""
+    df = pd.DataFrame.from_records(rows, columns=["sensor_id", "ts_utc", "average_db", "celsius"])
+    df["sensor_id"] = df["sensor_id"].astype(int)
+    df["ts"] = pd.to_datetime(df["ts_utc"], utc=True, format="ISO8601", errors="coerce")
+    for key in ("average_db", "celsius"):
+        df[key] = pd.to_numeric(df[key], errors="coerce")
+    return df
+
+def _in_window(df: pd.DataFrame, start: datetime, end: datetime) -> pd.Series:
+    return (df["ts"] >= start) & (df["ts"] <= end)
+
 def _mean(vals: List[float]) -> Optional[float]:
     if not vals:
         return None
     return sum(vals) / len(vals)
 
+def _top_indices(vals: np.ndarray, n: int) -> np.ndarray:
+    """Indices of the n largest values, largest first; ties keep index order like a stable sort."""
+    if vals.size <= n:
+        return np.argsort(-vals, kind="stable")
+    # O(N) partition to find the cut-off, then only the few candidates at or above it get sorted
+    cut = np.partition(vals, vals.size - n)[vals.size - n]
+    cand = np.flatnonzero(vals >= cut)
+    return cand[np.argsort(-vals[cand], kind="stable")[:n]]
+
 def _trend_label(curr_mean: Optional[float], prev_mean: Optional[float], eps: float = 0.15) -> str:
     if curr_mean is None or prev_mean is None:
         return "Unknown"
@@ -137,64 +296,94 @@ def _trend_label(curr_mean: Optional[float], prev_mean: Optional[float], eps: fl
         return "Stable"
     return "Worsening" if delta > 0 else "Improving"
 
-def _bucket_series(rows: List[dict], key: str, hours: int = 24) -> List[dict]:
-    now_utc = datetime.now(timezone.utc)
-    now_local = now_utc.astimezone(TORONTO_TZ)
-    start_local = now_local - timedelta(hours=hours)
-
-    buckets: Dict[datetime, List[float]] = {}
-
-    for r in rows:
-        ts_utc = _parse_ts(r.get("ts_utc"))
-        if ts_utc is None:
-            continue
-
-        ts_local = ts_utc.astimezone(TORONTO_TZ)
-
-        if ts_local < start_local or ts_local > now_local:
-            continue
-
-        v = r.get(key)
-        if v is None:
-            continue
-
-        hour_local = ts_local.replace(minute=0, second=0, microsecond=0)
-        buckets.setdefault(hour_local, []).append(float(v))
-
-    out = []
-    for hour_local in sorted(buckets.keys()):
-        out.append({
-            # epoch ms for that local-hour boundary instant
-            "t": int(hour_local.timestamp() * 1000),
-            "value": _mean(buckets[hour_local]),
-        })
+def _hourly_sums(df: pd.DataFrame, now: datetime, hours: int = 24) -> pd.DataFrame:
+    """Per (hour, sensor) sums and counts of both readings over the last `hours`."""
+    sel = df.loc[_in_window(df, now - timedelta(hours=hours), now)]
+    # Toronto's UTC offset is a whole number of hours, so the UTC hour floor is the local-hour boundary
+    return (
+        sel.groupby([sel["ts"].dt.floor("h").rename("hour"), "sensor_id"])
+        .agg(
+            celsius_sum=("celsius", "sum"),
+            celsius_n=("celsius", "count"),
+            average_db_sum=("average_db", "sum"),
+            average_db_n=("average_db", "count"),
+        )
+        .reset_index()
+    )
 
-    return out
-
-def _window_means(rows: List[dict], key: str, now: datetime) -> Dict[str, Tuple[Optional[float], Optional[float]]]:
-    def mean_in(start: datetime, end: datetime) -> Optional[float]:
-        vals: List[float] = []
-        for r in rows:
-            ts = _parse_ts(r.get("ts_utc"))
-            if ts is None:
-                continue
-            if start <= ts <= end:
-                v = r.get(key)
-                if v is not None:
-                    vals.append(float(v))
-        return _mean(vals)
-
-    last6_start = now - timedelta(hours=6)
-    prev6_start = now - timedelta(hours=12)
-    prev6_end = now - timedelta(hours=6)
-
-    last24_start = now - timedelta(hours=24)
-    prev24_start = now - timedelta(hours=48)
-    prev24_end = now - timedelta(hours=24)
+def _hour_slots(hourly: pd.DataFrame, now_utc: datetime, hours: int = 24) -> Tuple[pd.Timestamp, np.ndarray, np.ndarray]:
+    """
+    The series windows span a known run of hours+1 consecutive hours, so rows go into fixed slots
+    by hour offset. Returns the first slot's instant, each row's slot and a mask of rows in range.
+    """
+    base = pd.Timestamp(now_utc - timedelta(hours=hours)).floor("h")
+    idx = ((hourly["hour"] - base) // _ONE_HOUR).to_numpy(dtype=np.int64)
+    keep = (idx >= 0) & (idx <= hours)  # cached aggregates can trail "now" by an hour boundary
+    return base, idx, keep
+
+def _bucket_series(hourly: pd.DataFrame, key: str, now_utc: datetime, hours: int = 24) -> List[dict]:
+    if hourly.empty:
+        return []
+
+    base, idx, keep = _hour_slots(hourly, now_utc, hours)
+    slots = hours + 1
+    sums = np.bincount(idx[keep], weights=hourly[f"{key}_sum"].fillna(0.0).to_numpy()[keep], minlength=slots)
+    counts = np.bincount(idx[keep], weights=hourly[f"{key}_n"].to_numpy()[keep], minlength=slots)
+
+    return [
+        # epoch ms for that local-hour boundary instant
+        {"t": int((base + i * _ONE_HOUR).value // 1_000_000), "value": float(sums[i] / counts[i])}
+        for i in range(slots)
+        if counts[i] > 0
+    ]
+
+# trend windows: last6 = [now-6h, now], prev6 = [now-12h, now-6h], last24/prev24 likewise (bounds inclusive)
+_WINDOWS = ("last6", "prev6", "last24", "prev24")
+_READINGS = ("celsius", "average_db")
+
+def _accumulate_windows(df: pd.DataFrame, now: datetime) -> Dict[str, Dict[int, Dict[str, List[float]]]]:
+    """Per-reading, per-sensor [sum, count] for each trend window; each window mask is built once for both readings."""
+    bounds = {
+        "last6": (now - timedelta(hours=6), now),
+        "prev6": (now - timedelta(hours=12), now - timedelta(hours=6)),
+        "last24": (now - timedelta(hours=24), now),
+        "prev24": (now - timedelta(hours=48), now - timedelta(hours=24)),
+    }
 
+    acc: Dict[str, Dict[int, Dict[str, List[float]]]] = {key: {} for key in _READINGS}
+    for name, (start, end) in bounds.items():
+        agg = df.loc[_in_window(df, start, end)].groupby("sensor_id")[list(_READINGS)].agg(["sum", "count"])
+        sids = agg.index.tolist()
+        for key in _READINGS:
+            per_key = acc[key]
+            for sid, total, count in zip(sids, agg[(key, "sum")], agg[(key, "count")]):
+                if not count:
+                    continue
+                w = per_key.get(sid)
+                if w is None:
+                    w = per_key[sid] = {n: [0.0, 0] for n in _WINDOWS}
+                w[name] = [float(total), int(count)]
+
+    return acc
+
+def _merge_windows(accs: List[Dict[str, List[float]]]) -> Dict[str, List[float]]:
+    merged = {name: [0.0, 0] for name in _WINDOWS}
+    for w in accs:
+        for name in _WINDOWS:
+            merged[name][0] += w[name][0]
+            merged[name][1] += w[name][1]
+    return merged
+
+def _acc_mean(sum_count: List[float]) -> Optional[float]:
+    total, count = sum_count
+    return total / count if count else None
+
+def _window_means(w: Optional[Dict[str, List[float]]]) -> Dict[str, Tuple[Optional[float], Optional[float]]]:
+    if w is None:
+        return {"6h": (None, None), "24h": (None, None)}
     return {
-        "6h": (mean_in(last6_start, now), mean_in(prev6_start, prev6_end)),
-        "24h": (mean_in(last24_start, now), mean_in(prev24_start, prev24_end)),
+        "6h": (_acc_mean(w["last6"]), _acc_mean(w["prev6"])),
+        "24h": (_acc_mean(w["last24"]), _acc_mean(w["prev24"])),
     }
 
 def _heat_risk_label(temp_c: Optional[float]) -> str:
@@ -206,143 +395,249 @@ def _heat_risk_label(temp_c: Optional[float]) -> str:
         return "Elevated"
     return "Normal"
 
+# violation threshold by local hour (0-23), so per-reading lookups are a single index
+_NOISE_THR_BY_HOUR = np.where(
+    (np.arange(24) >= NOISE_NIGHT_START_H) | (np.arange(24) < NOISE_DAY_START_H),
+    NOISE_NIGHT_VIOLATION_DB,
+    NOISE_DAY_VIOLATION_DB,
+)
+
 def _noise_violation_threshold(now_local: datetime) -> float:
-    h = now_local.hour
-    is_night = (h >= NOISE_NIGHT_START_H) or (h < NOISE_DAY_START_H)
-    return NOISE_NIGHT_VIOLATION_DB if is_night else NOISE_DAY_VIOLATION_DB
+    return float(_NOISE_THR_BY_HOUR[now_local.hour])
 
-def _fetch_rows_last_hours(hours: int) -> List[dict]:
-    now = datetime.now(timezone.utc)
+async def _fetch_rows_last_hours(hours: int, now: datetime) -> List[dict]:
     start = now - timedelta(hours=hours)
 
-    res = (
-        supabase.table(TABLE_NAME)
-        .select("sensor_id,location_name,lat,lon,ts_utc,created_at,average_db,max_db,celsius")
-        .gte("ts_utc", start.isoformat())
-        .lte("ts_utc", now.isoformat())
-        .order("ts_utc", desc=False)
-        .limit(50000)
+    # keyset pages over (ts_utc, id), newest first: each page starts where the last one ended, so
+    # it neither re-reads the earlier rows (as OFFSET would) nor needs a count up front, and id
+    # makes the order total, so rows sharing a timestamp are neither repeated nor dropped
+    rows: List[dict] = []
+    cursor: Optional[Tuple[str, int]] = None
+    while True:
+        # only what the frame needs; per-sensor metadata comes from _fetch_latest_rows
+        q = (
+            supabase_async.table(TABLE_NAME)
+            .select(f"{FRAME_COLUMNS},id")
+            .gte("ts_utc", start.isoformat())
+            .lte("ts_utc", now.isoformat())
+        )
+        if cursor is not None:
+            ts, row_id = cursor
+            q = q.or_(f'ts_utc.lt."{ts}",and(ts_utc.eq."{ts}",id.lt.{row_id})')
+        res = await q.order("ts_utc", desc=True).order("id", desc=True).limit(FETCH_PAGE_ROWS).execute()
+        if res.data is None:
+            raise HTTPException(status_code=500, detail="Supabase query failed")
+        rows.extend(res.data)
+        if len(res.data) < FETCH_PAGE_ROWS:
+            return rows
+        last = res.data[-1]
+        cursor = (last["ts_utc"], last["id"])
+
+async def _fetch_latest_rows() -> List[dict]:
+    res = await (
+        supabase_async.table(LATEST_VIEW_NAME)
+        .select(ROW_COLUMNS)
+        .order("sensor_id", desc=False)
         .execute()
     )
     if res.data is None:
         raise HTTPException(status_code=500, detail="Supabase query failed")
     return res.data
 
-def _latest_per_sensor(rows: List[dict]) -> Dict[int, dict]:
-    latest: Dict[int, dict] = {}
-    for r in rows:
-        sid = int(r["sensor_id"])
-        ts = _parse_ts(r.get("ts_utc")) or datetime.min.replace(tzinfo=timezone.utc)
-        if sid not in latest:
-            latest[sid] = r
-            continue
-        prev_ts = _parse_ts(latest[sid].get("ts_utc")) or datetime.min.replace(tzinfo=timezone.utc)
-        if ts >= prev_ts:
-            latest[sid] = r
-    return latest
+# Dashboard aggregates, from either source:
+#   latest:  {sensor_id: latest row}
+#   windows: {"celsius" | "average_db": {sensor_id: {window: [sum, count]}}}
+#   hourly:  _hourly_sums frame for the last 24h
+
+def _aggregate_rows(rows: List[dict], latest_rows: List[dict], now: datetime) -> Dict[str, Any]:
+    df = _rows_frame(rows)
+
+    # the windowed rows only carry the reading columns; location and timestamps for "now" come
+    # from the sensor_latest rows, kept for the sensors that reported inside the window
+    reporting = set(df["sensor_id"].unique().tolist())
+    latest = {int(r["sensor_id"]): r for r in latest_rows if int(r["sensor_id"]) in reporting}
+
+    return {
+        "latest": latest,
+        "windows": _accumulate_windows(df, now),
+        "hourly": _hourly_sums(df, now),
+    }
+
+def _aggregates_from_rpc(data: Dict[str, Any]) -> Dict[str, Any]:
+    windows: Dict[str, Dict[int, Dict[str, List[float]]]] = {"celsius": {}, "average_db": {}}
+    for w in data["windows"]:
+        sid = int(w["sensor_id"])
+        for key, acc in windows.items():
+            per_sensor = acc.setdefault(sid, {name: [0.0, 0] for name in _WINDOWS})
+            per_sensor[w["window"]] = [float(w[f"{key}_sum"] or 0.0), int(w[f"{key}_n"])]
+
+    hourly = pd.DataFrame.from_records(
+        data["hourly"],
+        columns=["t", "sensor_id", "celsius_sum", "celsius_n", "average_db_sum", "average_db_n"],
+    )
+    hourly.insert(0, "hour", pd.to_datetime(hourly.pop("t"), unit="ms", utc=True))
+    hourly[["celsius_sum", "average_db_sum"]] = hourly[["celsius_sum", "average_db_sum"]].astype(float)
+
+    return {
+        "latest": {int(r["sensor_id"]): r for r in data["latest"]},
+        "windows": windows,
+        "hourly": hourly,
+    }
+
+_dashboard_rpc_available = True
+
+async def _query_dashboard_aggregates(hours: int) -> Dict[str, Any]:
+    global _dashboard_rpc_available
+    if _dashboard_rpc_available:
+        try:
+            res = await supabase_async.rpc(DASHBOARD_AGG_RPC, {"p_hours": hours}).execute()
+            return _aggregates_from_rpc(res.data)
+        except PostgrestAPIError as e:
+            # PGRST202: function not deployed, stop trying; anything else falls back for this call only
+            if e.code == "PGRST202":
+                _dashboard_rpc_available = False
+            logger.warning("%s RPC failed (%s), aggregating client-side", DASHBOARD_AGG_RPC, e.code)
+
+    # same instant for the query bounds and the trend windows
+    now = datetime.now(timezone.utc)
+    rows, latest_rows = await asyncio.gather(_fetch_rows_last_hours(hours, now), _fetch_latest_rows())
+    return _aggregate_rows(rows, latest_rows, now)
+
+_AGG_CACHE: Dict[int, Tuple[float, Dict[str, Any]]] = {}
+_AGG_CACHE_LOCKS: Dict[int, asyncio.Lock] = {}
+_AGG_REFRESH_TASKS: Dict[int, asyncio.Task] = {}
+
+async def _refresh_aggregates(hours: int) -> Dict[str, Any]:
+    lock = _AGG_CACHE_LOCKS.setdefault(hours, asyncio.Lock())
+    async with lock:
+        # another request may have refreshed while we waited on the lock
+        cached = _AGG_CACHE.get(hours)
+        if cached is not None and time.monotonic() - cached[0] < AGG_CACHE_TTL_S:
+            return cached[1]
+        agg = await _query_dashboard_aggregates(hours)
+        _AGG_CACHE[hours] = (time.monotonic(), agg)
+        return agg
+
+async def _refresh_aggregates_in_background(hours: int) -> None:
+    try:
+        await _refresh_aggregates(hours)
+    except Exception:
+        # keep serving the stale entry; the next miss past AGG_CACHE_STALE_S refetches
+        logger.exception("background refresh of dashboard aggregates failed")
+
+async def _fetch_dashboard_aggregates(hours: int) -> Dict[str, Any]:
+    """
+    Aggregates over the last `hours`, shared by every caller until they expire.
+    Callers must not mutate the result.
+    """
+    cached = _AGG_CACHE.get(hours)
+    if cached is not None:
+        age = time.monotonic() - cached[0]
+        if age < AGG_CACHE_TTL_S:
+            return cached[1]
+        if age < AGG_CACHE_STALE_S:
+            task = _AGG_REFRESH_TASKS.get(hours)
+            if task is None or task.done():
+                _AGG_REFRESH_TASKS[hours] = asyncio.create_task(_refresh_aggregates_in_background(hours))
+            return cached[1]
+    return await _refresh_aggregates(hours)
 
 @app.get("/sensor-data/range")
-def get_sensor_data_range(
+async def get_sensor_data_range(
     start: datetime,
     end: datetime,
     sensor_ids: Optional[List[int]] = Query(default=None),  # ?sensor_ids=1&sensor_ids=2
     time_column: str = Query(default="ts_utc", pattern="^(ts_utc|created_at)$"),
-) -> Dict[str, Any]:
+    limit: int = Query(default=FETCH_PAGE_ROWS, ge=1, le=FETCH_PAGE_ROWS),  # PostgREST cuts pages there anyway
+    cursor: Optional[str] = Query(default=None),  # next_cursor from the previous page
+    fields: Optional[str] = Query(default=None),  # ?fields=ts_utc,celsius, a subset of ROW_COLUMNS
+) -> ORJSONResponse:
     if start > end:
         raise HTTPException(status_code=400, detail="start must be <= end")
-    
-    print("HELOOOOs")
-    print(start, end, sensor_ids, time_column)
 
+    # id breaks ties between rows of one sensor with the same timestamp, for the cursor
+    columns = f"{ROW_COLUMNS},id"
+    if fields:
+        wanted = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = sorted(set(wanted) - ROW_FIELDS)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+        # sensor_id, the time column and id are always returned, grouping and the cursor need them
+        columns = ",".join(dict.fromkeys(["sensor_id", time_column, "id", *wanted]))
 
     q = (
-        supabase.table(TABLE_NAME)
-        .select("*")
+        supabase_async.table(TABLE_NAME)
+        .select(columns)
         .gte(time_column, start.isoformat())
         .lte(time_column, end.isoformat())
-        .order("sensor_id", desc=False)
-        .order(time_column, desc=False)
     )
 
     if sensor_ids:
         q = q.in_("sensor_id", sensor_ids)
 
-    res = q.execute()
+    # keyset pagination on (sensor_id, time_column, id), matching the sort order below
+    if cursor:
+        parts = cursor.split("|")
+        if len(parts) != 3 or not parts[0].isdigit() or not parts[2].isdigit() or _parse_ts(parts[1]) is None:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        c_sid, c_ts, c_id = parts
+        q = q.or_(
+            f'sensor_id.gt.{c_sid},'
+            f'and(sensor_id.eq.{c_sid},{time_column}.gt."{c_ts}"),'
+            f'and(sensor_id.eq.{c_sid},{time_column}.eq."{c_ts}",id.gt.{c_id})'
+        )
+
+    res = await (
+        q.order("sensor_id", desc=False)
+        .order(time_column, desc=False)
+        .order("id", desc=False)
+        .limit(limit)
+        .execute()
+    )
     if res.data is None:
         raise HTTPException(status_code=500, detail="Supabase query failed")
-    print(res.data)
+    logger.debug("range %s..%s on %s sensors=%s count=%d", start, end, time_column, sensor_ids, len(res.data))
+
+    next_cursor = None
+    if len(res.data) == limit:
+        last = res.data[-1]
+        next_cursor = f"{last['sensor_id']}|{last[time_column]}|{last['id']}"
+
     grouped: Dict[str, List[dict]] = {}
     for row in res.data:
         sid = str(row["sensor_id"])
         grouped.setdefault(sid, []).append(row)
-    print({
+    # returned as a response so FastAPI skips jsonable_encoder over every row
+    return ORJSONResponse({
         "start": start.isoformat(),
         "end": end.isoformat(),
         "time_column": time_column,
         "count": len(res.data),
         "by_sensor": grouped,
+        "next_cursor": next_cursor,
     })
-    return {
-        "start": start.isoformat(),
-        "end": end.isoformat(),
-        "time_column": time_column,
-        "count": len(res.data),
-        "by_sensor": grouped,
-    }
 
 
 @app.get("/sensor-data/latest")
-def get_latest_row_per_sensor() -> Dict[str, Any]:
-    time_column = "ts_utc" 
-
-    res = (
-        supabase.table(TABLE_NAME)
-        .select("*")
-        .order(time_column, desc=True)
-        .order("created_at", desc=True)
-        .limit(5000)  # plenty for 3 sensors
-        .execute()
-    )
-    if res.data is None:
-        raise HTTPException(status_code=500, detail="Supabase query failed")
-
-    latest: Dict[int, dict] = {}
-    for row in res.data:
-        sid = row["sensor_id"]
-        if sid not in latest:
-            latest[sid] = row
-
-    rows = [latest[k] for k in sorted(latest.keys())]
+async def get_latest_row_per_sensor() -> Dict[str, Any]:
+    rows = await _fetch_latest_rows()
     return {"count": len(rows), "rows": rows}
 
 @app.get("/sensors")
-def list_sensors() -> Dict[str, Any]:
-    res = (
-        supabase.table(TABLE_NAME)
-        .select("sensor_id,location_name,lat,lon,ts_utc")
-        .order("ts_utc", desc=True)
-        .limit(5000)
+async def list_sensors() -> Dict[str, Any]:
+    res = await (
+        supabase_async.table(LATEST_VIEW_NAME)
+        .select("sensor_id,location_name,lat,lon")
+        .order("sensor_id", desc=False)
         .execute()
     )
     if res.data is None:
         raise HTTPException(status_code=500, detail="Supabase query failed")
 
-    latest: Dict[int, dict] = {}
-    for row in res.data:
-        sid = row["sensor_id"]
-        if sid not in latest:
-            latest[sid] = {
-                "sensor_id": sid,
-                "location_name": row.get("location_name"),
-                "lat": row.get("lat"),
-                "lon": row.get("lon"),
-            }
-
-    rows = [latest[k] for k in sorted(latest.keys())]
-    return {"count": len(rows), "rows": rows}
+    return {"count": len(res.data), "rows": res.data}
 
 @app.get("/sensor-data/series")
-def get_sensor_series(
+async def get_sensor_series(
     sensor_id: int = Query(...),
     start: datetime = Query(...),
     end: datetime = Query(...),
@@ -351,8 +646,8 @@ def get_sensor_series(
     if start > end:
         raise HTTPException(status_code=400, detail="start must be <= end")
 
-    res = (
-        supabase.table(TABLE_NAME)
+    res = await (
+        supabase_async.table(TABLE_NAME)
         .select("ts_utc,created_at,average_db,max_db,celsius,sensor_id,location_name,lat,lon")
         .eq("sensor_id", sensor_id)
         .gte(time_column, start.isoformat())
@@ -362,16 +657,8 @@ def get_sensor_series(
     )
     if res.data is None:
         raise HTTPException(status_code=500, detail="Supabase query failed")
+    logger.debug("series sensor=%d %s..%s on %s count=%d", sensor_id, start, end, time_column, len(res.data))
 
-    
-    print( {
-        "sensor_id": sensor_id,
-        "start": start.isoformat(),
-        "end": end.isoformat(),
-        "time_column": time_column,
-        "count": len(res.data),
-        "rows": res.data,
-    })
     return {
         "sensor_id": sensor_id,
         "start": start.isoformat(),
@@ -381,87 +668,20 @@ def get_sensor_series(
         "rows": res.data,
     }
 
-@app.get("/dashboard/temperature")
-def dashboard_temperature(top_n: int = Query(default=5, ge=1, le=25)) -> Dict[str, Any]:
-    rows = _fetch_rows_last_hours(48)
-    latest = _latest_per_sensor(rows)
-    now_utc = datetime.now(timezone.utc)
-
-    # build per-sensor trends from rows grouped by sensor
-    rows_by_sensor: Dict[int, List[dict]] = {}
-    for r in rows:
-        rows_by_sensor.setdefault(int(r["sensor_id"]), []).append(r)
-
-    hotspots = []
-    for sid, lr in latest.items():
-        temp = lr.get("celsius")
-        wm = _window_means(rows_by_sensor.get(sid, []), "celsius", now_utc)
-        t6 = _trend_label(wm["6h"][0], wm["6h"][1])
-        t24 = _trend_label(wm["24h"][0], wm["24h"][1])
-
-        exceed = None
-        if temp is not None:
-            exceed = max(0.0, float(temp) - HEAT_ELEVATED_C)
-
-        hotspots.append({
-            "sensor_id": sid,
-            "location_name": lr.get("location_name") or f"Sensor {sid}",
-            "lat": lr.get("lat"),
-            "lon": lr.get("lon"),
-            "current_c": temp,
-            "risk_label": _heat_risk_label(float(temp) if temp is not None else None),
-            "threshold_exceedance_c": exceed,
-            "last_update_utc": lr.get("ts_utc") or lr.get("created_at"),
-            "trend_6h": t6,
-            "trend_24h": t24,
-        })
-
-    hotspots_sorted = sorted(
-        hotspots,
-        key=lambda x: (x["current_c"] is not None, x["current_c"]),
-        reverse=True
-    )[:top_n]
-
-    all_temp_rows = [r for r in rows if r.get("celsius") is not None]
-    city_wm = _window_means(all_temp_rows, "celsius", now_utc)
-    city_trend_6h = _trend_label(city_wm["6h"][0], city_wm["6h"][1])
-    city_trend_24h = _trend_label(city_wm["24h"][0], city_wm["24h"][1])
-
-    series_24h = _bucket_series(rows, "celsius", hours=24)
-
-    return {
-        "now_utc": now_utc.isoformat(),
-        "thresholds": {
-            "elevated_c": HEAT_ELEVATED_C,
-            "high_c": HEAT_HIGH_C,  # aligned to 31°C heat-warning
-            "note": "Temp-only (no humidity/humidex available)."
-        },
-        "top_hotspots_now": hotspots_sorted,
-        "trend": {
-            "city_6h": city_trend_6h,
-            "city_24h": city_trend_24h,
-        },
-        "series_24h": series_24h,
-    }
+def _noise_dashboard(agg: Dict[str, Any], now_utc: datetime, top_n: int) -> Dict[str, Any]:
+    latest = agg["latest"]
 
-@app.get("/dashboard/noise")
-def dashboard_noise(top_n: int = Query(default=5, ge=1, le=25)) -> Dict[str, Any]:
-    rows = _fetch_rows_last_hours(48)
-    latest = _latest_per_sensor(rows)
-    now_utc = datetime.now(timezone.utc)
+    # "now" and the threshold are resolved once per request and passed down
     now_local = now_utc.astimezone(TORONTO_TZ)
-
-    rows_by_sensor: Dict[int, List[dict]] = {}
-    for r in rows:
-        rows_by_sensor.setdefault(int(r["sensor_id"]), []).append(r)
-
     current_threshold = _noise_violation_threshold(now_local)
 
+    windows = agg["windows"]["average_db"]
+
     hotspots = []
     violations = []
     for sid, lr in latest.items():
         db = lr.get("average_db")
-        wm = _window_means(rows_by_sensor.get(sid, []), "average_db", now_utc)
+        wm = _window_means(windows.get(sid))
         t24 = _trend_label(wm["24h"][0], wm["24h"][1])
 
         exceed = None
@@ -486,17 +706,16 @@ def dashboard_noise(top_n: int = Query(default=5, ge=1, le=25)) -> Dict[str, Any
         if is_violation:
             violations.append(row_out)
 
-    hotspots_sorted = sorted(
+    hotspots_sorted = heapq.nlargest(
+        top_n,
         hotspots,
-        key=lambda x: (x["current_avg_db"] is not None, x["current_avg_db"]),
-        reverse=True
-    )[:top_n]
+        key=lambda x: (x["current_avg_db"] is not None, x["current_avg_db"] if x["current_avg_db"] is not None else -math.inf),
+    )
 
-    all_db_rows = [r for r in rows if r.get("average_db") is not None]
-    city_wm = _window_means(all_db_rows, "average_db", now_utc)
+    city_wm = _window_means(_merge_windows(list(windows.values())))
     city_trend_24h = _trend_label(city_wm["24h"][0], city_wm["24h"][1])
 
-    series_24h = _bucket_series(rows, "average_db", hours=24)
+    series_24h = _bucket_series(agg["hourly"], "average_db", now_utc)
 
     return {
         "now_utc": now_utc.isoformat(),
@@ -515,104 +734,57 @@ def dashboard_noise(top_n: int = Query(default=5, ge=1, le=25)) -> Dict[str, Any
         "series_24h": series_24h,
     }
 
-def _heat_risk_series_24h(rows_in: List[dict]) -> List[dict]:
-    now_utc = datetime.now(timezone.utc)
-    now_local = now_utc.astimezone(TORONTO_TZ)
-    start_local = now_local - timedelta(hours=24)
-
-    buckets: Dict[datetime, Dict[int, List[float]]] = {}
-
-    for r in rows_in:
-        ts_utc = _parse_ts(r.get("ts_utc"))
-        if ts_utc is None:
-            continue
-
-        ts_local = ts_utc.astimezone(TORONTO_TZ)
-
-        if ts_local < start_local or ts_local > now_local:
-            continue
-
-        v = r.get("celsius")
-        if v is None:
-            continue
-
-        hour_local = ts_local.replace(minute=0, second=0, microsecond=0)
-        sid = int(r["sensor_id"])
-        buckets.setdefault(hour_local, {}).setdefault(sid, []).append(float(v))
-
-    start_hour = start_local.replace(minute=0, second=0, microsecond=0)
-    end_hour = now_local.replace(minute=0, second=0, microsecond=0)
-
-    out: List[dict] = []
-    h = start_hour
-    while h <= end_hour:
-        elevated = 0
-        high = 0
-        total = 0
-
-        per_sensor = buckets.get(h, {})
-        for _, vals in per_sensor.items():
-            m = _mean(vals)
-            if m is None:
-                continue
-            total += 1
-            if m >= HEAT_HIGH_C:
-                high += 1
-            elif m >= HEAT_ELEVATED_C:
-                elevated += 1
-
-        out.append({
-            "t": int(h.timestamp() * 1000),
-            "elevated": elevated,
-            "high": high,
-            "total": total,
-        })
-        h = h + timedelta(hours=1)
+def _heat_risk_series_24h(hourly: pd.DataFrame, now_utc: datetime, hours: int = 24) -> List[dict]:
+    h = hourly[hourly["celsius_n"] > 0]
+    base, idx, keep = _hour_slots(h, now_utc, hours)
 
-    return out
+    # (hour slot, sensor) grid of temperature sums/counts, one column per sensor present
+    sensors, col = np.unique(h["sensor_id"].to_numpy()[keep], return_inverse=True)
+    sums = np.zeros((hours + 1, sensors.size))
+    counts = np.zeros((hours + 1, sensors.size))
+    np.add.at(sums, (idx[keep], col), h["celsius_sum"].to_numpy(dtype=float)[keep])
+    np.add.at(counts, (idx[keep], col), h["celsius_n"].to_numpy(dtype=float)[keep])
 
+    # per-sensor hourly mean temperature; NaN where a sensor has no reading that hour
+    reporting = counts > 0
+    means = np.divide(sums, counts, out=np.full_like(sums, np.nan), where=reporting)
+
+    total = reporting.sum(axis=1)
+    high = (means >= HEAT_HIGH_C).sum(axis=1)
+    elevated = ((means >= HEAT_ELEVATED_C) & (means < HEAT_HIGH_C)).sum(axis=1)
+
+    return [
+        {"t": int((base + i * _ONE_HOUR).value // 1_000_000), "elevated": int(e), "high": int(hi), "total": int(n)}
+        for i, (e, hi, n) in enumerate(zip(elevated, high, total))
+    ]
 
-@app.get("/dashboard/temperature")
-def dashboard_temperature(top_n: int = Query(default=5, ge=1, le=25)) -> Dict[str, Any]:
-    rows = _fetch_rows_last_hours(48)
-    latest = _latest_per_sensor(rows)
-    now_utc = datetime.now(timezone.utc)
 
-    rows_by_sensor: Dict[int, List[dict]] = {}
-    for r in rows:
-        rows_by_sensor.setdefault(int(r["sensor_id"]), []).append(r)
+def _temperature_dashboard(agg: Dict[str, Any], now_utc: datetime, top_n: int) -> Dict[str, Any]:
+    latest = agg["latest"]
 
-    # Heat risk (now)
+    windows = agg["windows"]["celsius"]
+
+    # Heat risk (now) and hotspots (per sensor) + 24h trend, in one pass over the sensors
     latest_temps: List[float] = []
     elevated_now = 0
     high_now = 0
-    total_sensors_now = 0
-
-    for _, lr in latest.items():
-        temp = lr.get("celsius")
-        if temp is None:
-            continue
-        total_sensors_now += 1
-        ft = float(temp)
-        latest_temps.append(ft)
-        if ft >= HEAT_HIGH_C:
-            high_now += 1
-        elif ft >= HEAT_ELEVATED_C:
-            elevated_now += 1
 
-    city_now_temp = _mean(latest_temps)
-    city_now_risk = _heat_risk_label(city_now_temp)
-
-    # Hotspots (per sensor) + 24h trend only
     hotspots = []
     for sid, lr in latest.items():
         temp = lr.get("celsius")
-        wm = _window_means(rows_by_sensor.get(sid, []), "celsius", now_utc)
-        t24 = _trend_label(wm["24h"][0], wm["24h"][1])
+        ft = float(temp) if temp is not None else None
 
         exceed = None
-        if temp is not None:
-            exceed = max(0.0, float(temp) - HEAT_ELEVATED_C)
+        if ft is not None:
+            latest_temps.append(ft)
+            if ft >= HEAT_HIGH_C:
+                high_now += 1
+            elif ft >= HEAT_ELEVATED_C:
+                elevated_now += 1
+            exceed = max(0.0, ft - HEAT_ELEVATED_C)
+
+        wm = _window_means(windows.get(sid))
+        t24 = _trend_label(wm["24h"][0], wm["24h"][1])
 
         hotspots.append({
             "sensor_id": sid,
@@ -620,25 +792,28 @@ def dashboard_temperature(top_n: int = Query(default=5, ge=1, le=25)) -> Dict[st
             "lat": lr.get("lat"),
             "lon": lr.get("lon"),
             "current_c": temp,
-            "risk_label": _heat_risk_label(float(temp) if temp is not None else None),
+            "risk_label": _heat_risk_label(ft),
             "threshold_exceedance_c": exceed,
             "last_update_utc": lr.get("ts_utc") or lr.get("created_at"),
             "trend_24h": t24,
         })
 
-    hotspots_sorted = sorted(
+    total_sensors_now = len(latest_temps)
+    city_now_temp = _mean(latest_temps)
+    city_now_risk = _heat_risk_label(city_now_temp)
+
+    hotspots_sorted = heapq.nlargest(
+        top_n,
         hotspots,
-        key=lambda x: (x["current_c"] is not None, x["current_c"]),
-        reverse=True
-    )[:top_n]
+        key=lambda x: (x["current_c"] is not None, x["current_c"] if x["current_c"] is not None else -math.inf),
+    )
 
     # City 24h trend only
-    all_temp_rows = [r for r in rows if r.get("celsius") is not None]
-    city_wm = _window_means(all_temp_rows, "celsius", now_utc)
+    city_wm = _window_means(_merge_windows(list(windows.values())))
     city_trend_24h = _trend_label(city_wm["24h"][0], city_wm["24h"][1])
 
-    series_24h = _bucket_series(rows, "celsius", hours=24)
-    heat_risk_series_24h = _heat_risk_series_24h(rows)
+    series_24h = _bucket_series(agg["hourly"], "celsius", now_utc)
+    heat_risk_series_24h = _heat_risk_series_24h(agg["hourly"], now_utc)
 
     return {
         "now_utc": now_utc.isoformat(),
@@ -665,103 +840,155 @@ def dashboard_temperature(top_n: int = Query(default=5, ge=1, le=25)) -> Dict[st
         "series_24h": series_24h,
     }
 
+# Built payloads per (dashboard, top_n), reused while they were built from the current aggregates.
+# The aggregate fetch already collapses concurrent misses onto one upstream call, and building is
+# synchronous, so no extra lock is needed here.
+_RESPONSE_CACHE: TTLCache = TTLCache(maxsize=32, ttl=AGG_CACHE_STALE_S)
+
+async def _dashboard_response(
+    name: str, top_n: int, build: Callable[[Dict[str, Any], datetime, int], Dict[str, Any]]
+) -> Response:
+    agg = await _fetch_dashboard_aggregates(48)
+    key = (name, top_n)
+    hit = _RESPONSE_CACHE.get(key)
+    if hit is not None and hit[0] is agg:
+        return Response(content=hit[1], media_type="application/json")
+    # cache the rendered JSON, so a hit skips both the build and the encode
+    body = ORJSONResponse(build(agg, datetime.now(timezone.utc), top_n)).body
+    _RESPONSE_CACHE[key] = (agg, body)
+    return Response(content=body, media_type="application/json")
+
+def _summary_dashboard(agg: Dict[str, Any], now_utc: datetime, top_n: int) -> Dict[str, Any]:
+    return {
+        "temperature": _temperature_dashboard(agg, now_utc, top_n),
+        "noise": _noise_dashboard(agg, now_utc, top_n),
+    }
+
+@app.get("/dashboard/noise")
+async def dashboard_noise(top_n: int = Query(default=5, ge=1, le=25)) -> Response:
+    return await _dashboard_response("noise", top_n, _noise_dashboard)
+
+@app.get("/dashboard/temperature")
+async def dashboard_temperature(top_n: int = Query(default=5, ge=1, le=25)) -> Response:
+    return await _dashboard_response("temperature", top_n, _temperature_dashboard)
+
+@app.get("/dashboard/summary")
+async def dashboard_summary(top_n: int = Query(default=5, ge=1, le=25)) -> Response:
+    # both dashboards from one aggregate fetch, for pages that show them side by side
+    return await _dashboard_response("summary", top_n, _summary_dashboard)
+
+def _require_admin(x_admin_key: Optional[str] = Header(default=None)) -> None:
+    if not (ADMIN_API_KEY and x_admin_key and secrets.compare_digest(x_admin_key.encode(), ADMIN_API_KEY.encode())):
+        raise HTTPException(status_code=401, detail="Invalid or missing X-Admin-Key")
+
+@app.post("/admin/cache/flush", dependencies=[Depends(_require_admin)])
+async def flush_cache() -> Dict[str, Any]:
+    flushed = len(_AGG_CACHE)
+    _AGG_CACHE.clear()
+    _RESPONSE_CACHE.clear()
+    _PRED_CACHE.clear()
+    return {"flushed": flushed}
+
+@app.get("/metrics", dependencies=[Depends(_require_admin)])
+async def cache_metrics() -> Dict[str, Any]:
+    return {
+        "dashboard_aggregates": {"size": len(_AGG_CACHE)},
+        "dashboard_responses": {"size": len(_RESPONSE_CACHE), "maxsize": _RESPONSE_CACHE.maxsize},
+        "predictions": {
+            "size": len(_PRED_CACHE),
+            "maxsize": _PRED_CACHE.maxsize,
+            "ttl_s": PRED_CACHE_TTL_S,
+            **_PRED_CACHE_STATS,
+        },
+    }
+
 # AI METHODS
+def _ensure_utc(dt: datetime) -> datetime:
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+def _fmt_local(ts_utc: datetime) -> str:
+    return ts_utc.astimezone(TORONTO_TZ).strftime("%Y-%m-%d %H:%M")
+
+def _basic_stats(vals: np.ndarray) -> dict:
+    if not vals.size:
+        return {"n": 0, "mean": None, "min": None, "p50": None, "p90": None, "max": None}
+    p50, p90 = np.percentile(vals, [50, 90])  # linear interpolation between closest ranks
+    return {
+        "n": int(vals.size),
+        "mean": round(float(vals.mean()), 3),
+        "min": round(float(vals.min()), 3),
+        "p50": round(float(p50), 3),
+        "p90": round(float(p90), 3),
+        "max": round(float(vals.max()), 3),
+    }
+
+# ts below is already in local time (converted once for the whole frame)
+def _top_events(vals: np.ndarray, ts: pd.DatetimeIndex, n: int = 5) -> list[dict]:
+    ok = np.flatnonzero(~np.isnan(vals) & ~ts.isna())
+    top = ok[_top_indices(vals[ok], n)]
+    return [{"t_local": ts[i].strftime("%Y-%m-%d %H:%M"), "value": round(float(vals[i]), 3)} for i in top]
+
+def _biggest_jumps(vals: np.ndarray, ts: pd.DatetimeIndex, n: int = 5) -> list[dict]:
+    ok = np.flatnonzero(~np.isnan(vals) & ~ts.isna())
+    ok = ok[np.argsort(ts.asi8[ok], kind="stable")]
+    if ok.size < 2:
+        return []
+
+    dv = np.diff(vals[ok])
+    step = np.flatnonzero(np.diff(ts.asi8[ok]) > 0)  # skip duplicate timestamps
+    top = step[_top_indices(np.abs(dv[step]), n)]
+    return [
+        {
+            "from_local": ts[ok[i]].strftime("%Y-%m-%d %H:%M"),
+            "to_local": ts[ok[i + 1]].strftime("%Y-%m-%d %H:%M"),
+            "delta": round(float(dv[i]), 3),
+        }
+        for i in top
+    ]
+
+def _round_or_none(x: float) -> Optional[float]:
+    return None if math.isnan(x) else round(float(x), 3)
+
+def _series_notes(
+    vals: np.ndarray, ts: pd.DatetimeIndex, n_top: int = 5, n_jumps: int = 5
+) -> Tuple[dict, list[dict], list[dict]]:
+    """Stats, top events and biggest jumps for one metric; one compiled pass when Numba is available."""
+    if stats_and_jumps is None:
+        return (
+            _basic_stats(vals[~np.isnan(vals)]),
+            _top_events(vals, ts, n_top) if n_top else [],
+            _biggest_jumps(vals, ts, n_jumps) if n_jumps else [],
+        )
+
+    cnt, mean, lo, p50, p90, hi, top, j_from, j_to, j_delta = stats_and_jumps(vals, ts.asi8, n_top, n_jumps)
+    stats = {
+        "n": int(cnt),
+        "mean": _round_or_none(mean),
+        "min": _round_or_none(lo),
+        "p50": _round_or_none(p50),
+        "p90": _round_or_none(p90),
+        "max": _round_or_none(hi),
+    }
+    top_events = [{"t_local": ts[i].strftime("%Y-%m-%d %H:%M"), "value": round(float(vals[i]), 3)} for i in top]
+    jumps = [
+        {
+            "from_local": ts[a].strftime("%Y-%m-%d %H:%M"),
+            "to_local": ts[b].strftime("%Y-%m-%d %H:%M"),
+            "delta": round(float(d), 3),
+        }
+        for a, b, d in zip(j_from, j_to, j_delta)
+    ]
+    return stats, top_events, jumps
+
 @app.post("/ai/sensor-analysis")
-def ai_sensor_analysis(req: SensorAnalysisRequest) -> dict:
+async def ai_sensor_analysis(req: SensorAnalysisRequest) -> dict:
     """
-    Requires (add near imports if missing):
-      import json, math
-      from openai import OpenAI
     Env:
       OPENAI_API_KEY (server-side), optional OPENAI_MODEL (defaults below)
     """
 
-    import json
-    import math
-    from openai import OpenAI
-
-    # --------- helpers (local to keep this drop-in) ---------
-    def _ensure_utc(dt: datetime) -> datetime:
-        if dt.tzinfo is None:
-            return dt.replace(tzinfo=timezone.utc)
-        return dt.astimezone(timezone.utc)
-
-    def _fmt_local(ts_utc: datetime) -> str:
-        return ts_utc.astimezone(TORONTO_TZ).strftime("%Y-%m-%d %H:%M")
-
-    def _pct(vals: list[float], p: float) -> float | None:
-        if not vals:
-            return None
-        x = sorted(vals)
-        if len(x) == 1:
-            return float(x[0])
-        k = (len(x) - 1) * (p / 100.0)
-        f = math.floor(k)
-        c = math.ceil(k)
-        if f == c:
-            return float(x[int(k)])
-        return float(x[f] + (x[c] - x[f]) * (k - f))
-
-    def _basic_stats(vals: list[float]) -> dict:
-        if not vals:
-            return {"n": 0, "mean": None, "min": None, "p50": None, "p90": None, "max": None}
-        return {
-            "n": len(vals),
-            "mean": round(sum(vals) / len(vals), 3),
-            "min": round(min(vals), 3),
-            "p50": round(_pct(vals, 50) or 0.0, 3),
-            "p90": round(_pct(vals, 90) or 0.0, 3),
-            "max": round(max(vals), 3),
-        }
-
-    def _noise_threshold_for_local_hour(h: int) -> float:
-        is_night = (h >= NOISE_NIGHT_START_H) or (h < NOISE_DAY_START_H)
-        return NOISE_NIGHT_VIOLATION_DB if is_night else NOISE_DAY_VIOLATION_DB
-
-    def _top_events(rows: list[dict], key: str, n: int = 5) -> list[dict]:
-        items = []
-        for r in rows:
-            v = r.get(key)
-            if v is None:
-                continue
-            ts = _parse_ts(r.get("ts_utc"))
-            if ts is None:
-                continue
-            items.append((float(v), ts))
-        items.sort(key=lambda t: t[0], reverse=True)
-        out = []
-        for v, ts in items[:n]:
-            out.append({"t_local": _fmt_local(ts), "value": round(v, 3)})
-        return out
-
-    def _biggest_jumps(rows: list[dict], key: str, n: int = 5) -> list[dict]:
-        pts = []
-        for r in rows:
-            v = r.get(key)
-            ts = _parse_ts(r.get("ts_utc"))
-            if v is None or ts is None:
-                continue
-            pts.append((ts, float(v)))
-        pts.sort(key=lambda x: x[0])
-        jumps = []
-        for i in range(1, len(pts)):
-            dt = (pts[i][0] - pts[i - 1][0]).total_seconds()
-            if dt <= 0:
-                continue
-            dv = pts[i][1] - pts[i - 1][1]
-            jumps.append((abs(dv), dv, pts[i][0], pts[i - 1][0]))
-        jumps.sort(key=lambda x: x[0], reverse=True)
-        out = []
-        for _, dv, t2, t1 in jumps[:n]:
-            out.append(
-                {
-                    "from_local": _fmt_local(t1),
-                    "to_local": _fmt_local(t2),
-                    "delta": round(dv, 3),
-                }
-            )
-        return out
-
     # --------- validate / defaults ---------
     if not (req.message or "").strip():
         raise HTTPException(status_code=400, detail="message is required")
@@ -779,9 +1006,12 @@ def ai_sensor_analysis(req: SensorAnalysisRequest) -> dict:
     if end - start > max_window:
         start = end - max_window
 
+    start_local = _fmt_local(start)
+    end_local = _fmt_local(end)
+
     # --------- fetch minimal rows from Supabase ---------
-    res = (
-        supabase.table(TABLE_NAME)
+    res = await (
+        supabase_async.table(TABLE_NAME)
         .select("ts_utc,average_db,max_db,celsius,sensor_id,location_name,lat,lon")
         .eq("sensor_id", req.sensor_id)
         .gte("ts_utc", start.isoformat())
@@ -798,8 +1028,7 @@ def ai_sensor_analysis(req: SensorAnalysisRequest) -> dict:
         return {
             "reply": (
                 f"No data found for sensor {req.sensor_id} in window "
-                f"{start.astimezone(TORONTO_TZ).strftime('%Y-%m-%d %H:%M')} → "
-                f"{end.astimezone(TORONTO_TZ).strftime('%Y-%m-%d %H:%M')} (local)."
+                f"{start_local} → {end_local} (local)."
             )
         }
 
@@ -817,33 +1046,34 @@ def ai_sensor_analysis(req: SensorAnalysisRequest) -> dict:
         if loc_name and lat is not None and lon is not None:
             break
 
-    # numeric series
-    temps = [float(r["celsius"]) for r in rows if r.get("celsius") is not None]
-    avgdb = [float(r["average_db"]) for r in rows if r.get("average_db") is not None]
-    maxdb = [float(r["max_db"]) for r in rows if r.get("max_db") is not None]
+    # numeric series, parsed once for all the stats below (NaN / NaT where missing)
+    frame = pd.DataFrame.from_records(rows, columns=["ts_utc", "celsius", "average_db", "max_db"])
+    ts_all = pd.DatetimeIndex(pd.to_datetime(frame["ts_utc"], utc=True, format="ISO8601", errors="coerce"))
+    temp_all = pd.to_numeric(frame["celsius"], errors="coerce").to_numpy(dtype=float)
+    avgdb_all = pd.to_numeric(frame["average_db"], errors="coerce").to_numpy(dtype=float)
+    maxdb_all = pd.to_numeric(frame["max_db"], errors="coerce").to_numpy(dtype=float)
+    # one vectorized UTC -> Toronto conversion (DST-aware) serves the thresholds and event labels
+    ts_local = ts_all.tz_convert(TORONTO_TZ)
+
+    # notable events say little about a handful of rows, and on very dense windows the jump
+    # search (a sort by time) is skipped while the top values are still reported
+    n_top = 5 if len(rows) >= AI_NOTABLE_MIN else 0
+    n_jumps = n_top if len(rows) <= AI_NOTABLE_MAX else 0
+
+    temps = temp_all[~np.isnan(temp_all)]
+    temp_stats, _, temp_jumps = _series_notes(temp_all, ts_local, n_top=0, n_jumps=n_jumps)
+    avgdb_stats, avgdb_top, avgdb_jumps = _series_notes(avgdb_all, ts_local, n_top=n_top, n_jumps=n_jumps)
+    maxdb_stats, maxdb_top, _ = _series_notes(maxdb_all, ts_local, n_top=n_top, n_jumps=0)
 
     # violations (noise) per-reading, based on local hour
-    noise_violations = 0
-    noise_total = 0
-    for r in rows:
-        v = r.get("average_db")
-        ts = _parse_ts(r.get("ts_utc"))
-        if v is None or ts is None:
-            continue
-        h = ts.astimezone(TORONTO_TZ).hour
-        thr = _noise_threshold_for_local_hour(h)
-        noise_total += 1
-        if float(v) >= thr:
-            noise_violations += 1
+    has_db = ~np.isnan(avgdb_all) & ~ts_all.isna()
+    thr = _NOISE_THR_BY_HOUR[ts_local[has_db].hour.to_numpy()]
+    noise_total = int(has_db.sum())
+    noise_violations = int((avgdb_all[has_db] >= thr).sum())
 
     # heat categories
-    elevated_ct = 0
-    high_ct = 0
-    for t in temps:
-        if t >= HEAT_HIGH_C:
-            high_ct += 1
-        elif t >= HEAT_ELEVATED_C:
-            elevated_ct += 1
+    high_ct = int((temps >= HEAT_HIGH_C).sum())
+    elevated_ct = int(((temps >= HEAT_ELEVATED_C) & (temps < HEAT_HIGH_C)).sum())
 
     # last values (if present)
     last_ts = _parse_ts(rows[-1].get("ts_utc")) or end
@@ -864,8 +1094,8 @@ def ai_sensor_analysis(req: SensorAnalysisRequest) -> dict:
         "window": {
             "start_utc": start.isoformat(),
             "end_utc": end.isoformat(),
-            "start_local": start.astimezone(TORONTO_TZ).strftime("%Y-%m-%d %H:%M"),
-            "end_local": end.astimezone(TORONTO_TZ).strftime("%Y-%m-%d %H:%M"),
+            "start_local": start_local,
+            "end_local": end_local,
             "row_count": len(rows),
             "note": "Data may be truncated if extremely dense (limit 15000 rows).",
         },
@@ -879,9 +1109,9 @@ def ai_sensor_analysis(req: SensorAnalysisRequest) -> dict:
         },
         "latest": last_vals,
         "stats": {
-            "temperature_c": _basic_stats(temps),
-            "average_db": _basic_stats(avgdb),
-            "max_db": _basic_stats(maxdb),
+            "temperature_c": temp_stats,
+            "average_db": avgdb_stats,
+            "max_db": maxdb_stats,
             "heat_counts": {
                 "elevated": elevated_ct,
                 "high": high_ct,
@@ -894,46 +1124,31 @@ def ai_sensor_analysis(req: SensorAnalysisRequest) -> dict:
             },
         },
         "notable": {
-            "top_max_db": _top_events(rows, "max_db", n=5),
-            "top_avg_db": _top_events(rows, "average_db", n=5),
-            "biggest_avg_db_jumps": _biggest_jumps(rows, "average_db", n=5),
-            "biggest_temp_jumps": _biggest_jumps(rows, "celsius", n=5),
-        },
+            "top_max_db": maxdb_top,
+            "top_avg_db": avgdb_top,
+            "biggest_avg_db_jumps": avgdb_jumps,
+            "biggest_temp_jumps": temp_jumps,
+        } if n_top else {},
     }
 
     meta = SENSOR_META.get(int(req.sensor_id))
     if meta:
         context["sensor"]["meta"] = meta
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
+    if openai_client is None:
         return {"reply": "Server missing OPENAI_API_KEY. Set it in your backend environment."}
 
     model = os.getenv("OPENAI_MODEL", "gpt-5.2")
-    client = OpenAI(api_key=api_key)
-
-    instructions = (
-        "You are MeshStat Assistant, a municipal-style sensor data analyst.\n"
-        "Use only the provided context; do not invent readings or timestamps.\n"
-        "Answer the user's question clearly and compactly.\n"
-        "Output format (plain text, no markdown):\n"
-        "1) One-line title: Sensor + window\n"
-        "2) Summary (3-6 bullets)\n"
-        "3) Notable events (up to 5 bullets; include local timestamps when available)\n"
-        "4) Interpretation + next checks (2-5 bullets)\n"
-        "If data is sparse, say what is missing and what would help."
-        "Use sensor.meta as ground truth for location/context and expectations.\n"
-    )
 
     user_input = (
         "USER QUESTION:\n"
         f"{req.message.strip()}\n\n"
         "CONTEXT (JSON):\n"
-        f"{json.dumps(context, ensure_ascii=False)}"
+        f"{orjson.dumps(context).decode()}"
     )
 
-    resp = client.responses.create(
+    resp = await openai_client.responses.create(
         model=model,
-        instructions=instructions,
+        instructions=AI_INSTRUCTIONS,
         input=user_input,
         temperature=0.2,
         max_output_tokens=450,
@@ -943,18 +1158,81 @@ def ai_sensor_analysis(req: SensorAnalysisRequest) -> dict:
     return {"reply": reply}
 
 
+async def _fetch_predict_history(sensor_id: int, metric: str, tail_rows: int, now: datetime) -> FetchedHistory:
+    # the features only read the last few rows of history, so fetch just those
+    res = await history_tail_query(
+        supabase_async, TABLE_NAME, sensor_id, metric, tail_rows, now, PREDICT_LOOKBACK_HOURS
+    ).execute()
+    return history_arrays_from_tail(res, sensor_id, metric)
+
+
+# Successful /ai/sensor-predict results per (sensor_id, metric, future time), so a chart polling the
+# same point skips the Supabase round trip and the model. Keyed on the exact time: the horizon is
+# rounded to the nearest minute from the last reading, so times within one minute can predict
+# differently. Only touched from the event loop.
+_PRED_CACHE: TTLCache = TTLCache(maxsize=4096, ttl=PRED_CACHE_TTL_S)
+_PRED_CACHE_STATS = {"hits": 0, "misses": 0}
+
 @app.post("/ai/sensor-predict", response_model=SensorPredictResponse)
-def ai_sensor_predict(req: SensorPredictRequest) -> dict:
+async def ai_sensor_predict(req: SensorPredictRequest) -> dict:
+    key = (req.sensor_id, req.metric, req.future_ts_utc.isoformat())
+    hit = _PRED_CACHE.get(key)
+    if hit is not None:
+        _PRED_CACHE_STATS["hits"] += 1
+        return hit
+    _PRED_CACHE_STATS["misses"] += 1
+
     try:
         models_dir = os.getenv("MODELS_DIR", "models")
-        return predict_from_supabase(
-            supabase_client=supabase,
-            table_name=TABLE_NAME,
-            sensor_id=req.sensor_id,
+
+        # the bundle says how many rows to fetch (cached after the first load, which reads from disk)
+        bundle = await run_in_threadpool(load_bundle_cached, models_dir, req.metric)
+
+        # history comes through the shared async client; only the model runs in the threadpool
+        hist = await _fetch_predict_history(
+            req.sensor_id, req.metric, history_rows_needed(bundle), datetime.now(timezone.utc)
+        )
+        result = await run_in_threadpool(
+            predict_from_arrays,
+            hist=hist,
             metric=req.metric,          # "celsius" or "average_db"
             future_ts_utc=req.future_ts_utc,
             models_dir=models_dir,
-            lookback_hours=72,
+            lookback_hours=PREDICT_LOOKBACK_HOURS,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction failed: {e}")
+
+    _PRED_CACHE[key] = result
+    return result
+
+
+@app.post("/ai/sensor-predict-batch", response_model=SensorPredictBatchResponse)
+async def ai_sensor_predict_batch(req: SensorPredictBatchRequest) -> dict:
+    """
+    Several sensors x future times in one request: one history fetch per sensor (concurrent) and
+    a single model call for every pair. Pairs that cannot be predicted carry "error".
+    """
+    try:
+        models_dir = os.getenv("MODELS_DIR", "models")
+        bundle = await run_in_threadpool(load_bundle_cached, models_dir, req.metric)
+
+        # per-sensor tail queries rather than one in_() over the whole window: each returns only the
+        # rows its features read, and they run side by side on the pooled connections
+        now = datetime.now(timezone.utc)
+        sensor_ids = list(dict.fromkeys(req.sensor_ids))
+        hists = await asyncio.gather(
+            *(_fetch_predict_history(sid, req.metric, history_rows_needed(bundle), now) for sid in sensor_ids)
+        )
+        return await run_in_threadpool(
+            predict_batch_from_arrays,
+            hists=list(hists),
+            metric=req.metric,
+            future_ts_utc=req.future_ts_utc,
+            models_dir=models_dir,
+            lookback_hours=PREDICT_LOOKBACK_HOURS,
         )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -964,7 +1242,9 @@ def ai_sensor_predict(req: SensorPredictRequest) -> dict:
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="127.0.0.1", port=8000)
+    # loop/http "auto" pick uvloop and httptools when installed (see requirements.txt);
+    # uvloop has no Windows build, so there it stays on asyncio
+    uvicorn.run(app, host="127.0.0.1", port=8000, loop="auto", http="auto")
 
 
 
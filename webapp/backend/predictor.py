@@ -1,19 +1,23 @@
 from __future__ import annotations
 
+import math
 import os
+import threading
 from dataclasses import dataclass
-from typing import List, Union
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Union
 
-import joblib
 import numpy as np
 import pandas as pd
 
 
-
 TORONTO_TZ = "America/Toronto"
 
 LAGS_MIN = [1, 5, 15, 60]
 ROLL_WINS_MIN = [5, 15, 60]
+# as tuples for the compiled kernel
+_LAGS_MIN_T = tuple(LAGS_MIN)
+_ROLL_WINS_MIN_T = tuple(ROLL_WINS_MIN)
 
 
 @dataclass
@@ -23,6 +27,18 @@ class ModelBundle:
     model: object
     hmax_min: int
     cadence_min: int
+    dtype: str = "float32"  # model input dtype; features are computed in float64 and cast once at predict
+
+
+@dataclass
+class FetchedHistory:
+    """
+    One sensor's history for the prediction path, oldest first.
+    """
+    sensor_id: int
+    ts_utc: np.ndarray  # datetime64[ns], UTC
+    y: np.ndarray  # float64 target, NaN where missing
+
 
 import sys
 import __main__ as _main
@@ -34,19 +50,22 @@ except Exception:
     pass
 
 
-# --------- time / feature helpers ---------
+@lru_cache(maxsize=None)
+def _deps():
+    """
+    joblib and the Numba feature kernel (which imports numba) are only needed once a model is
+    used; importing them on first use keeps ~0.2s out of startup for processes that never predict.
+    numpy/pandas stay top-level: main.py imports them anyway.
+    """
+    import joblib
+    from _feat_numba import last_lag_roll
 
-def _ensure_datetime_utc(df: pd.DataFrame) -> pd.DataFrame:
-    if "ts_utc" not in df.columns:
-        raise ValueError("Expected a 'ts_utc' column in the history dataframe.")
-    out = df.copy()
-    out["ts_utc"] = pd.to_datetime(out["ts_utc"], utc=True, errors="coerce")
-    if out["ts_utc"].isna().any():
-        bad = out[out["ts_utc"].isna()].head(5)
-        raise ValueError(f"Invalid ts_utc values found. Examples:\n{bad}")
-    return out
+    return joblib, last_lag_roll
 
 
+# --------- time / feature helpers ---------
+
+@lru_cache(maxsize=1024)  # charts re-ask for the same few future times
 def _parse_future_time(future_time: Union[str, pd.Timestamp]) -> pd.Timestamp:
     ts = pd.to_datetime(future_time, errors="raise")
 
@@ -57,25 +76,41 @@ def _parse_future_time(future_time: Union[str, pd.Timestamp]) -> pd.Timestamp:
     return ts.tz_convert("UTC")
 
 
-def _add_time_features(df: pd.DataFrame) -> pd.DataFrame:
-    out = df.copy()
-    ts_local = out["ts_utc"].dt.tz_convert(TORONTO_TZ)
+# sin/cos of every local hour and minute, written exactly as the training features compute them
+# (np.sin(2 * np.pi * hour / 24.0), ...) so values match to the bit (a tree split can sit right at
+# sin(pi) ~ 1e-16)
+_HOUR_SIN = tuple(math.sin(2 * math.pi * h / 24.0) for h in range(24))
+_HOUR_COS = tuple(math.cos(2 * math.pi * h / 24.0) for h in range(24))
+_MIN_SIN = tuple(math.sin(2 * math.pi * m / 60.0) for m in range(60))
+_MIN_COS = tuple(math.cos(2 * math.pi * m / 60.0) for m in range(60))
 
-    out["hour"] = ts_local.dt.hour
-    out["minute"] = ts_local.dt.minute
-    out["dow"] = ts_local.dt.dayofweek
-    out["is_weekend"] = (out["dow"] >= 5).astype(int)
 
-    out["hour_sin"] = np.sin(2 * np.pi * out["hour"] / 24.0)
-    out["hour_cos"] = np.cos(2 * np.pi * out["hour"] / 24.0)
-    out["min_sin"] = np.sin(2 * np.pi * out["minute"] / 60.0)
-    out["min_cos"] = np.cos(2 * np.pi * out["minute"] / 60.0)
-    return out
+def _time_features_scalar(ts_utc: pd.Timestamp) -> Dict[str, float]:
+    """
+    The time features (local hour/minute/day of week and their encodings) for a single timestamp,
+    the row the model is asked about.
+    """
+    ts_local = ts_utc.tz_convert(TORONTO_TZ)
+    hour, minute, dow = ts_local.hour, ts_local.minute, ts_local.dayofweek
+    return {
+        "hour": hour,
+        "minute": minute,
+        "dow": dow,
+        "is_weekend": int(dow >= 5),
+        "hour_sin": _HOUR_SIN[hour],
+        "hour_cos": _HOUR_COS[hour],
+        "min_sin": _MIN_SIN[minute],
+        "min_cos": _MIN_COS[minute],
+    }
 
 
 def _make_lag_roll_features(df: pd.DataFrame, target: str, cadence_min: int) -> pd.DataFrame:
-    out = df.copy().sort_values(["sensor_id", "ts_utc"])
-    g = out.groupby("sensor_id", group_keys=False)[target]
+    """
+    Adds the lag/rolling columns to df, one sensor's rows in ts_utc order. The pandas version of
+    _feat_numba.last_lag_roll, used when Numba is off.
+    """
+    out = df
+    g = out[target]
 
     for lag_min in LAGS_MIN:
         steps = int(lag_min / cadence_min)
@@ -90,13 +125,100 @@ def _make_lag_roll_features(df: pd.DataFrame, target: str, cadence_min: int) ->
     return out
 
 
-# --------- model bundle loading (cached) ---------
+def _lag_roll_names(target: str) -> List[str]:
+    # column order of _feat_numba.last_lag_roll's output
+    return (
+        [f"{target}_lag_{lag_min}m" for lag_min in LAGS_MIN]
+        + [f"{target}_roll_mean_{win_min}m" for win_min in ROLL_WINS_MIN]
+        + [f"{target}_roll_std_{win_min}m" for win_min in ROLL_WINS_MIN]
+    )
 
-_BUNDLE_CACHE: dict[str, ModelBundle] = {}
 
+def history_rows_needed(bundle: ModelBundle) -> int:
+    """
+    Rows of history the last-row features read: the longest lag or rolling window (in steps) plus the last row.
+    """
+    return max(int(m / bundle.cadence_min) for m in LAGS_MIN + ROLL_WINS_MIN) + 1
+
+
+# feature_cols -> {name: column index}, shared by every bundle with the same columns
+_FEATURE_POS_CACHE: Dict[tuple, Dict[str, int]] = {}
+
+
+def _feature_positions(feature_cols: List[str]) -> Dict[str, int]:
+    key = tuple(feature_cols)
+    pos = _FEATURE_POS_CACHE.get(key)
+    if pos is None:
+        pos = _FEATURE_POS_CACHE[key] = {name: i for i, name in enumerate(feature_cols)}
+    return pos
+
+
+# per-thread scratch row for the model input, reused across predictions (predict is synchronous,
+# so a thread never has two in flight)
+_TLS = threading.local()
+_FEATURE_BUFFER_COLS = 256
+
+
+def _feature_buffer(n: int, dtype: str) -> np.ndarray:
+    buf = getattr(_TLS, "x", None)
+    if buf is None or buf.shape[1] < n or buf.dtype != dtype:
+        buf = _TLS.x = np.empty((1, max(n, _FEATURE_BUFFER_COLS)), dtype=dtype)
+    X = buf[:, :n]
+    X.fill(np.nan)
+    return X
+
+
+def _fast_predict(bundle: ModelBundle) -> Callable[[np.ndarray], np.ndarray]:
+    """
+    The cheapest predict entry point for bundle.model, looked up once per bundle. Boosted-tree
+    wrappers go straight to their booster, skipping the sklearn-level input checks that cost
+    more than the walk for a single row; anything else uses the public predict.
+    """
+    fn = getattr(bundle, "_fast_predict", None)
+    if fn is not None:
+        return fn
+
+    model = bundle.model
+    if hasattr(model, "steps"):
+        # a Pipeline may select columns by name
+        fn = lambda X: model.predict(pd.DataFrame(X, columns=bundle.feature_cols, copy=False))
+    elif hasattr(model, "get_booster"):
+        fn = _xgb_inplace_predict(model) or model.predict
+    elif hasattr(model, "booster_"):
+        # lightgbm sklearn wrapper
+        booster = model.booster_
+        fn = lambda X: booster.predict(X, num_threads=1)
+    else:
+        fn = model.predict
+
+    object.__setattr__(bundle, "_fast_predict", fn)
+    return fn
+
+
+def _xgb_inplace_predict(model) -> Optional[Callable[[np.ndarray], np.ndarray]]:
+    """
+    What the xgboost sklearn wrapper's predict() ends up calling, minus the per-call setup. That
+    setup lives in private methods, so None (use model.predict) when this xgboost does not have
+    them or the model cannot predict in place.
+    """
+    try:
+        if not model._can_use_inplace_predict():
+            return None
+        iteration_range = model._get_iteration_range(None)
+        booster = model.get_booster()
+    except (AttributeError, TypeError):
+        return None
+    return lambda X: booster.inplace_predict(
+        X, iteration_range=iteration_range, missing=model.missing, validate_features=False
+    )
+
+
+# --------- model bundle loading (cached) ---------
 
 def _load_bundle(path: str) -> ModelBundle:
-    b = joblib.load(path)
+    # numpy arrays in the bundle are memory-mapped (demand-paged from disk) rather than copied into RAM
+    joblib, _ = _deps()
+    b = joblib.load(path, mmap_mode="r")
     for attr in ["target", "feature_cols", "model", "hmax_min", "cadence_min"]:
         if not hasattr(b, attr):
             raise ValueError(f"Bundle at '{path}' missing '{attr}'. Retrain or fix bundle.")
@@ -106,6 +228,7 @@ def _load_bundle(path: str) -> ModelBundle:
         model=getattr(b, "model"),
         hmax_min=int(getattr(b, "hmax_min")),
         cadence_min=int(getattr(b, "cadence_min")),
+        dtype=str(getattr(b, "dtype", "float32")),
     )
 
 
@@ -118,143 +241,291 @@ def load_bundle_cached(models_dir: str, metric: str) -> ModelBundle:
     """
     filename = f"{metric}_bundle.joblib"
     path = os.path.join(models_dir, filename)
+    return _bundle_cache()(path)
 
-    if path in _BUNDLE_CACHE:
-        return _BUNDLE_CACHE[path]
 
+@lru_cache(maxsize=None)
+def _bundle_cache() -> Callable[[str], ModelBundle]:
+    """
+    Bounded, so a process serving many model dirs does not keep every bundle it ever loaded.
+    Sized on first use rather than at import, so MESHSTAT_BUNDLE_CACHE from a .env loaded
+    after this module is imported still applies.
+    """
+    return lru_cache(maxsize=int(os.getenv("MESHSTAT_BUNDLE_CACHE", "8")))(_load_bundle_checked)
+
+
+def _load_bundle_checked(path: str) -> ModelBundle:
     if not os.path.exists(path):
         raise ValueError(f"Missing model bundle: {path}")
-
-    bundle = _load_bundle(path)
-    _BUNDLE_CACHE[path] = bundle
-    return bundle
+    return _load_bundle(path)
 
 
 # --------- prediction core ---------
 
-def predict_at_time(bundle: ModelBundle, history_df: pd.DataFrame, sensor_id: int, future_time: Union[str, pd.Timestamp]) -> float:
-    df = _ensure_datetime_utc(history_df)
+def predict_at_time_arrays(bundle: ModelBundle, hist: FetchedHistory, future_time: Union[str, pd.Timestamp]) -> float:
+    """
+    The model's prediction at future_time from one sensor's history (see history_arrays_from_rows).
+    """
+    if hist.y.size == 0:
+        raise ValueError(f"No rows found for sensor_id={hist.sensor_id}")
+    return _predict_last_row(bundle, hist.y, pd.Timestamp(hist.ts_utc[-1], tz="UTC"), hist.sensor_id, future_time)
 
-    if "sensor_id" not in df.columns:
-        raise ValueError("Expected 'sensor_id' column in the history dataframe.")
-    if bundle.target not in df.columns:
-        raise ValueError(f"History is missing required column '{bundle.target}'.")
 
-    df = df[df["sensor_id"] == sensor_id].copy()
-    if df.empty:
-        raise ValueError(f"No rows found for sensor_id={sensor_id}")
+def _predict_last_row(
+    bundle: ModelBundle, y: np.ndarray, now_utc: pd.Timestamp, sensor_id: int, future_time: Union[str, pd.Timestamp]
+) -> float:
+    """
+    y: the target series, oldest first, ending at the reading taken at now_utc.
+    """
+    horizon_min = _horizon_min(bundle, now_utc, _parse_future_time(future_time))
+    row = _last_row_features(bundle, y, now_utc, sensor_id)
+    row["horizon_min"] = horizon_min
 
-    df[bundle.target] = pd.to_numeric(df[bundle.target], errors="coerce")
-    df = df.sort_values("ts_utc")
+    # the model input is a bare (1, n_features) array in feature_cols order; unknown columns stay NaN.
+    # XGBoost works in float32, so handing it float32 skips its own conversion copy
+    pos = _feature_positions(bundle.feature_cols)
+    X = _feature_buffer(len(pos), bundle.dtype)
+    _fill_features(X[0], pos, row)
+    _check_features(bundle, X[0])
+    return float(_fast_predict(bundle)(X)[0])
 
-    now_utc = df["ts_utc"].iloc[-1]
-    fut_utc = _parse_future_time(future_time)
 
+def _horizon_min(bundle: ModelBundle, now_utc: pd.Timestamp, fut_utc: pd.Timestamp) -> int:
     horizon_min = int(round((fut_utc - now_utc).total_seconds() / 60.0))
     if horizon_min < 1:
         raise ValueError(f"future_time must be after last data point. last={now_utc} future={fut_utc}")
     if horizon_min > bundle.hmax_min:
         raise ValueError(f"horizon {horizon_min}m exceeds trained hmax {bundle.hmax_min}m. Retrain with larger hmax.")
+    return horizon_min
 
-    df = _add_time_features(df)
-    df = _make_lag_roll_features(df, bundle.target, bundle.cadence_min)
-
-    last = df.iloc[-1:].copy()
-    last["horizon_min"] = horizon_min
 
-    X = last[bundle.feature_cols].copy()
-    if X.isna().any(axis=None):
-        missing = X.columns[X.isna().any()].tolist()
+def _last_row_features(bundle: ModelBundle, y: np.ndarray, now_utc: pd.Timestamp, sensor_id: int) -> Dict[str, float]:
+    """
+    Every feature of the last row except horizon_min: lags/rolling stats of y, time of now_utc, sensor_id.
+    Only the last row feeds the model, so it is built directly rather than for the whole history.
+    """
+    lag_roll_names = _lag_roll_names(bundle.target)
+    _, last_lag_roll = _deps()
+    if last_lag_roll is not None:
+        lag_roll = last_lag_roll(y, bundle.cadence_min, _LAGS_MIN_T, _ROLL_WINS_MIN_T)
+    else:
+        df = pd.DataFrame({bundle.target: y})
+        lag_roll = _make_lag_roll_features(df, bundle.target, bundle.cadence_min)[lag_roll_names].iloc[-1]
+
+    row = dict(zip(lag_roll_names, lag_roll))
+    row.update(_time_features_scalar(now_utc))
+    row["sensor_id"] = sensor_id
+    return row
+
+
+def _fill_features(x: np.ndarray, pos: Dict[str, int], row: Dict[str, float]) -> None:
+    for name, value in row.items():
+        i = pos.get(name)
+        if i is not None:
+            x[i] = value
+
+
+def _check_features(bundle: ModelBundle, x: np.ndarray) -> None:
+    if np.isnan(x).any():
+        missing = [bundle.feature_cols[i] for i in np.flatnonzero(np.isnan(x))]
         raise ValueError(
             "Not enough history to compute features. "
             f"Missing: {missing}. "
             "Provide >=60 minutes of recent history for this sensor."
         )
 
-    return float(bundle.model.predict(X)[0])
+
+def predict_batch_arrays(
+    bundle: ModelBundle, hists: List[FetchedHistory], future_times: List[Union[str, pd.Timestamp]]
+) -> List[List[Union[float, str]]]:
+    """
+    Every (history, future time) pair in one model call. Each sensor's lag/rolling features are
+    built once and only horizon_min varies across its rows.
+    Returns one list per history, one entry per future time: the prediction, or the error message
+    predict_at_time_arrays would have raised for that pair.
+    """
+    pos = _feature_positions(bundle.feature_cols)
+    futs = [_parse_future_time(t) for t in future_times]
+    out: List[List[Union[float, str]]] = [[""] * len(futs) for _ in hists]
+
+    X = np.full((len(hists) * len(futs), len(pos)), np.nan, dtype=bundle.dtype)
+    slots = []  # (row in X, history index, future index) of the pairs that can be predicted
+    for h, hist in enumerate(hists):
+        if hist.y.size == 0:
+            out[h] = [f"No rows found for sensor_id={hist.sensor_id}"] * len(futs)
+            continue
+        now_utc = pd.Timestamp(hist.ts_utc[-1], tz="UTC")
+        row = _last_row_features(bundle, hist.y, now_utc, hist.sensor_id)
+        for f, fut_utc in enumerate(futs):
+            k = h * len(futs) + f
+            try:
+                row["horizon_min"] = _horizon_min(bundle, now_utc, fut_utc)
+                _fill_features(X[k], pos, row)
+                _check_features(bundle, X[k])
+            except ValueError as e:
+                out[h][f] = str(e)
+                continue
+            slots.append((k, h, f))
+
+    if slots:
+        preds = _fast_predict(bundle)(X[[k for k, _, _ in slots]])
+        for (_, h, f), pred in zip(slots, preds):
+            out[h][f] = float(pred)
+    return out
+
+
+def warm_up(models_dir: str = "models") -> None:
+    """
+    Loads both bundles and runs one throwaway prediction each, so the bundle load, the Numba
+    compile and the model's first predict happen at startup instead of on the first request.
+    """
+    for metric in ("average_db", "celsius"):
+        bundle = load_bundle_cached(models_dir=models_dir, metric=metric)
+        n = history_rows_needed(bundle)
+        ts = pd.date_range(end=pd.Timestamp("2025-01-01", tz="UTC"), periods=n, freq=f"{bundle.cadence_min}min")
+        hist = FetchedHistory(sensor_id=0, ts_utc=ts.values, y=np.zeros(n))
+        predict_at_time_arrays(bundle, hist, ts[-1] + pd.Timedelta(minutes=bundle.cadence_min))
 
 
 # --------- supabase integration ---------
 
-def fetch_history_from_supabase(
+def history_arrays_from_rows(data: List[dict], sensor_id: int, metric: str) -> FetchedHistory:
+    """
+    data is one sensor's rows, oldest first; only ts_utc and the metric are kept.
+    """
+    ts = _ts_utc_column(data)
+    return FetchedHistory(sensor_id=int(sensor_id), ts_utc=ts.values, y=_float_column(data, metric))
+
+
+def history_tail_query(
     supabase_client,
     table_name: str,
     sensor_id: int,
+    metric: str,
+    tail_rows: int,
+    now_utc,  # datetime / Timestamp, upper bound of the window
     lookback_hours: int = 72,
-    limit: int = 50000,
-) -> pd.DataFrame:
+):
     """
-    Returns a DataFrame with at least: sensor_id, ts_utc, average_db, celsius
+    Query for the last tail_rows readings of one metric within the lookback window, newest first
+    (see history_rows_needed). Works with both the sync and the async Supabase client: execute it
+    (or await execute()) and pass the response to history_arrays_from_tail.
     """
-    now_utc = pd.Timestamp.now(tz="UTC")
-    start_utc = now_utc - pd.Timedelta(hours=lookback_hours)
-
-    res = (
+    return (
         supabase_client.table(table_name)
-        .select("sensor_id,ts_utc,average_db,celsius")
+        .select(f"ts_utc,{metric}")
         .eq("sensor_id", sensor_id)
-        .gte("ts_utc", start_utc.isoformat())
+        .gte("ts_utc", (now_utc - pd.Timedelta(hours=lookback_hours)).isoformat())
         .lte("ts_utc", now_utc.isoformat())
-        .order("ts_utc", desc=False)
-        .limit(limit)
-        .execute()
+        .order("ts_utc", desc=True)
+        .limit(tail_rows)
     )
 
+
+def history_arrays_from_tail(res, sensor_id: int, metric: str) -> FetchedHistory:
     data = getattr(res, "data", None)
     if data is None:
         raise RuntimeError("Supabase query failed (res.data is None).")
 
-    df = pd.DataFrame(data)
-    if df.empty:
-        return df
+    # the tail comes newest first; history is oldest first
+    return history_arrays_from_rows(data[::-1], sensor_id, metric)
 
-    # Ensure required columns exist (even if missing in data)
-    for col in ["sensor_id", "ts_utc", "average_db", "celsius"]:
-        if col not in df.columns:
-            df[col] = None
 
-    return df
+def _ts_utc_column(data: List[dict]) -> pd.DatetimeIndex:
+    """
+    Parses every row's ts_utc, raising with the raw values that are missing or not ISO 8601.
+    """
+    ts = pd.to_datetime(
+        np.fromiter((r.get("ts_utc") for r in data), dtype=object, count=len(data)),
+        utc=True, format="ISO8601", errors="coerce",
+    )
+    if ts.isna().any():
+        bad = [r.get("ts_utc") for r, t in zip(data, ts.isna()) if t][:5]
+        raise ValueError(f"Invalid ts_utc values found. Examples:\n{bad}")
+    return ts
 
 
-def predict_from_supabase(
-    supabase_client,
-    table_name: str,
-    sensor_id: int,
+def _float_column(data: List[dict], key: str) -> np.ndarray:
+    return np.fromiter(
+        (np.nan if (v := r.get(key)) is None else v for r in data), dtype=np.float64, count=len(data)
+    )
+
+
+def predict_from_arrays(
+    hist: FetchedHistory,
     metric: str,  # "average_db" or "celsius"
     future_ts_utc,  # datetime from FastAPI / Pydantic
     models_dir: str = "models",
     lookback_hours: int = 72,
 ) -> dict:
     """
-    Returns a dict shaped like your SensorPredictResponse.
+    Returns a dict shaped like SensorPredictResponse, for history the caller fetched
+    (see history_tail_query / history_arrays_from_tail).
     """
     if metric not in ("average_db", "celsius"):
         raise ValueError("metric must be 'average_db' or 'celsius'")
 
-    hist = fetch_history_from_supabase(
-        supabase_client=supabase_client,
-        table_name=table_name,
-        sensor_id=sensor_id,
-        lookback_hours=lookback_hours,
-    )
-    if hist.empty:
-        raise ValueError(f"No recent history found for sensor_id={sensor_id} (lookback={lookback_hours}h).")
+    if hist.y.size == 0:
+        raise ValueError(f"No recent history found for sensor_id={hist.sensor_id} (lookback={lookback_hours}h).")
 
     bundle = load_bundle_cached(models_dir=models_dir, metric=metric)
 
-    # Future time: accept datetime or string; convert to pandas Timestamp
     future_str = future_ts_utc.isoformat() if hasattr(future_ts_utc, "isoformat") else str(future_ts_utc)
+    pred = predict_at_time_arrays(bundle=bundle, hist=hist, future_time=future_str)
+    return _prediction_response(hist.sensor_id, metric, future_str, pred, models_dir, lookback_hours)
 
-    pred = predict_at_time(bundle=bundle, history_df=hist, sensor_id=sensor_id, future_time=future_str)
 
-    unit = "°C" if metric == "celsius" else "dBA"
-    model_name = os.path.basename(os.path.join(models_dir, f"{metric}_bundle.joblib"))
+def predict_batch_from_arrays(
+    hists: List[FetchedHistory],
+    metric: str,  # "average_db" or "celsius"
+    future_ts_utc: list,  # datetimes from FastAPI / Pydantic
+    models_dir: str = "models",
+    lookback_hours: int = 72,
+) -> dict:
+    """
+    predict_from_arrays for several sensors and future times at once (see predict_batch_arrays).
+    A pair that cannot be predicted gets "error" instead of failing the whole batch.
+    """
+    if metric not in ("average_db", "celsius"):
+        raise ValueError("metric must be 'average_db' or 'celsius'")
 
+    bundle = load_bundle_cached(models_dir=models_dir, metric=metric)
+    future_strs = [t.isoformat() if hasattr(t, "isoformat") else str(t) for t in future_ts_utc]
+    results = predict_batch_arrays(bundle, hists, future_strs)
+
+    predictions = []
+    for hist, per_sensor in zip(hists, results):
+        if hist.y.size == 0:
+            per_sensor = [
+                f"No recent history found for sensor_id={hist.sensor_id} (lookback={lookback_hours}h)."
+            ] * len(future_strs)
+        for future_str, res in zip(future_strs, per_sensor):
+            item = {"sensor_id": int(hist.sensor_id), "future_ts_utc": future_str}
+            if isinstance(res, str):
+                item["error"] = res
+            else:
+                item["prediction"] = res
+            predictions.append(item)
+
+    return {"metric": metric, **_model_meta(metric, models_dir, lookback_hours), "predictions": predictions}
+
+
+def _prediction_response(
+    sensor_id: int, metric: str, future_str: str, pred: float, models_dir: str, lookback_hours: int
+) -> dict:
     return {
         "sensor_id": int(sensor_id),
         "metric": metric,
         "future_ts_utc": future_str,
         "prediction": float(pred),
+        **_model_meta(metric, models_dir, lookback_hours),
+    }
+
+
+def _model_meta(metric: str, models_dir: str, lookback_hours: int) -> dict:
+    unit = "°C" if metric == "celsius" else "dBA"
+    model_name = os.path.basename(os.path.join(models_dir, f"{metric}_bundle.joblib"))
+    return {
         "unit": unit,
         "model": model_name,
         "note": f"Predicted using last {lookback_hours}h history from Supabase + trained bundle.",
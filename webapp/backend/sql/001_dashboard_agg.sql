@@ -0,0 +1,64 @@
+-- Dashboard aggregates computed in Postgres so /dashboard/* no longer pulls ~50k raw rows.
+-- Called via supabase.rpc("dashboard_agg", {"p_hours": 48}); main.py falls back to
+-- client-side aggregation when this function is not deployed.
+
+-- Indexes: see 003_indexes.sql.
+
+create or replace function dashboard_agg(p_hours int default 48, p_series_hours int default 24)
+returns jsonb
+language sql
+stable
+as $$
+-- w is read by three CTEs, so Postgres materializes it; keep it to the columns used below
+with w as (
+    select sensor_id, location_name, lat, lon, ts_utc, created_at, average_db, max_db, celsius
+    from sensor_data_backup
+    where ts_utc >= now() - make_interval(hours => p_hours)
+      and ts_utc <= now()
+),
+latest as (
+    select distinct on (sensor_id)
+        sensor_id, location_name, lat, lon, ts_utc, created_at, average_db, max_db, celsius
+    from w
+    order by sensor_id, ts_utc desc
+),
+-- trend windows, bounds inclusive (matches main._accumulate_windows)
+bounds (name, lo, hi) as (
+    values
+        ('last6',  now() - interval '6 hours',  now()),
+        ('prev6',  now() - interval '12 hours', now() - interval '6 hours'),
+        ('last24', now() - interval '24 hours', now()),
+        ('prev24', now() - interval '48 hours', now() - interval '24 hours')
+),
+windows as (
+    select
+        w.sensor_id,
+        b.name as "window",
+        sum(w.celsius) as celsius_sum,
+        count(w.celsius) as celsius_n,
+        sum(w.average_db) as average_db_sum,
+        count(w.average_db) as average_db_n
+    from w
+    join bounds b on w.ts_utc between b.lo and b.hi
+    group by w.sensor_id, b.name
+),
+-- per-sensor hourly sums; America/Toronto offsets are whole hours, so truncating
+-- in UTC lands on the same instants as the local-hour boundaries
+hourly as (
+    select
+        (extract(epoch from date_trunc('hour', ts_utc at time zone 'UTC')) * 1000)::bigint as t,
+        sensor_id,
+        sum(celsius) as celsius_sum,
+        count(celsius) as celsius_n,
+        sum(average_db) as average_db_sum,
+        count(average_db) as average_db_n
+    from w
+    where ts_utc >= now() - make_interval(hours => p_series_hours)
+    group by 1, 2
+)
+select jsonb_build_object(
+    'latest',  (select coalesce(jsonb_agg(to_jsonb(l)), '[]'::jsonb) from latest l),
+    'windows', (select coalesce(jsonb_agg(to_jsonb(x)), '[]'::jsonb) from windows x),
+    'hourly',  (select coalesce(jsonb_agg(to_jsonb(h)), '[]'::jsonb) from hourly h)
+);
+$$;
@@ -0,0 +1,32 @@
+-- One row per sensor (its most recent reading), used by /sensors and /sensor-data/latest
+-- instead of pulling thousands of rows and de-duplicating in Python.
+--
+-- A plain `distinct on (sensor_id)` still walks every row of the table. Instead, the recursive
+-- CTE skips through the distinct sensor ids and the lateral subquery reads one row per sensor,
+-- so the cost is a few index probes per sensor however much history is stored.
+
+-- Needs the (sensor_id, ts_utc desc) index from 003_indexes.sql.
+
+create or replace view sensor_latest
+with (security_invoker = true)
+as
+with recursive sensors as (
+    (select sensor_id from sensor_data_backup where sensor_id is not null order by sensor_id limit 1)
+    union all
+    select (
+        select d.sensor_id from sensor_data_backup d
+        where d.sensor_id > s.sensor_id
+        order by d.sensor_id
+        limit 1
+    )
+    from sensors s
+    where s.sensor_id is not null
+)
+select l.*
+from sensors s
+cross join lateral (
+    select * from sensor_data_backup d
+    where d.sensor_id = s.sensor_id
+    order by d.ts_utc desc, d.created_at desc
+    limit 1
+) l;
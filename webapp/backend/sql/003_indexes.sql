@@ -0,0 +1,20 @@
+-- Indexes for the time-range reads (dashboards, /sensor-data/range, predictor history).
+-- CONCURRENTLY cannot run inside a transaction: run these one statement at a time.
+
+-- (sensor_id, ts_utc desc) serves the per-sensor reads: the predictor's history tail, the
+-- sensor_latest probes and /sensor-data/range with sensor_ids. The predictor tail reads only
+-- ts_utc and one metric, both covered by the INCLUDE columns, so it can be an index-only scan
+-- (heap visits only for pages not yet all-visible). The range and sensor_latest reads return
+-- other columns too and still visit the heap. The all-sensor dashboard reads filter and sort on
+-- ts_utc first, which this index cannot drive; they get a bitmap heap scan from the BRIN index below.
+create index concurrently if not exists sensor_data_backup_sensor_ts_cov_idx
+    on sensor_data_backup (sensor_id, ts_utc desc)
+    include (average_db, celsius, created_at);
+
+-- the covering index answers every query the plain one did
+drop index concurrently if exists sensor_data_backup_sensor_ts_idx;
+
+-- readings are appended in time order, so a BRIN index narrows the all-sensor 48h window
+-- to a few block ranges at a tiny fraction of a btree's size
+create index concurrently if not exists sensor_data_backup_ts_brin_idx
+    on sensor_data_backup using brin (ts_utc) with (pages_per_range = 32);
@@ -0,0 +1,229 @@
+"""
+Shared fixtures: main.py's app with an in-memory stand-in for the Supabase async client.
+
+FakeSupabase implements the slice of the postgrest query builder main.py and predictor.py use
+(filters, or_ groups, order, limit/range, exact counts) over lists of row dicts, and caps every
+response at max_rows like PostgREST's max-rows setting.
+"""
+
+import math
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+ADMIN_KEY = "test-admin-key"
+
+# set before main is imported: it reads these at import (load_dotenv does not override them)
+os.environ.setdefault("SUPABASE_URL", "http://supabase.invalid")
+os.environ.setdefault("SUPABASE_KEY", "test-key")
+os.environ["ADMIN_API_KEY"] = ADMIN_KEY
+os.environ["MODELS_DIR"] = os.path.join(BACKEND_DIR, "models")
+
+# the endpoints window their queries on the wall clock, so the fixture rows end at it
+NOW = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+
+_TS_COLUMNS = ("ts_utc", "created_at")
+
+
+class FakeResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+def _value(col, v):
+    if isinstance(v, str):
+        v = v.strip('"')
+        if col in _TS_COLUMNS:
+            return datetime.fromisoformat(v.replace("Z", "+00:00"))
+        try:
+            return float(v)
+        except ValueError:
+            return v
+    return v
+
+
+def _compare(row, col, op, v):
+    x = row.get(col)
+    if x is None:
+        return False
+    x, v = _value(col, x), _value(col, v)
+    return {
+        "eq": x == v, "gt": x > v, "gte": x >= v, "lt": x < v, "lte": x <= v,
+    }[op]
+
+
+def _split_top(expr):
+    parts, depth, cur = [], 0, ""
+    for ch in expr:
+        if ch == "," and depth == 0:
+            parts.append(cur)
+            cur = ""
+            continue
+        depth += ch == "("
+        depth -= ch == ")"
+        cur += ch
+    parts.append(cur)
+    return parts
+
+
+def _match_term(row, term):
+    if term.startswith("and(") and term.endswith(")"):
+        return all(_match_term(row, t) for t in _split_top(term[4:-1]))
+    if term.startswith("or(") and term.endswith(")"):
+        return any(_match_term(row, t) for t in _split_top(term[3:-1]))
+    col, op, v = term.split(".", 2)
+    return _compare(row, col, op, v)
+
+
+class FakeQuery:
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.columns = "*"
+        self.count = None
+        self.filters = []
+        self.orders = []
+        self.offset = 0
+        self.n = None
+
+    def select(self, columns="*", count=None):
+        self.columns, self.count = columns, count
+        return self
+
+    def _filter(self, col, op, v):
+        self.filters.append(lambda r: _compare(r, col, op, v))
+        return self
+
+    def eq(self, col, v):
+        return self._filter(col, "eq", v)
+
+    def gt(self, col, v):
+        return self._filter(col, "gt", v)
+
+    def gte(self, col, v):
+        return self._filter(col, "gte", v)
+
+    def lt(self, col, v):
+        return self._filter(col, "lt", v)
+
+    def lte(self, col, v):
+        return self._filter(col, "lte", v)
+
+    def in_(self, col, values):
+        values = set(values)
+        self.filters.append(lambda r: r.get(col) in values)
+        return self
+
+    def or_(self, expr):
+        terms = _split_top(expr)
+        self.filters.append(lambda r: any(_match_term(r, t) for t in terms))
+        return self
+
+    def order(self, col, desc=False):
+        self.orders.append((col, desc))
+        return self
+
+    def limit(self, n):
+        self.n = n
+        return self
+
+    def range(self, start, end):
+        self.offset, self.n = start, end - start + 1
+        return self
+
+    async def execute(self):
+        self.db.requests.append(self)
+        rows = [r for r in self.db.tables[self.table] if all(f(r) for f in self.filters)]
+        for col, desc in reversed(self.orders):
+            rows.sort(key=lambda r: _value(col, r[col]), reverse=desc)
+        total = len(rows)
+        n = self.db.max_rows if self.n is None else min(self.n, self.db.max_rows)
+        rows = rows[self.offset:self.offset + n]
+        if self.columns != "*":
+            cols = self.columns.split(",")
+            rows = [{c: r.get(c) for c in cols} for r in rows]
+        return FakeResponse(rows, total if self.count else None)
+
+
+class FakeSupabase:
+    def __init__(self, tables, max_rows=1000):
+        self.tables = tables
+        self.max_rows = max_rows
+        self.requests = []
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def rpc(self, name, params=None):
+        from postgrest import APIError
+
+        raise APIError({"code": "PGRST202", "message": f"function {name} not found"})
+
+    def requests_to(self, table):
+        return [q for q in self.requests if q.table == table]
+
+
+def make_rows(hours=3, sensors=(1, 2), end=NOW, step_min=1):
+    """
+    One reading per sensor per step ending at `end`, oldest first, with unique ids.
+    """
+    rows = []
+    n = int(hours * 60 / step_min)
+    for i in range(n + 1):
+        ts = (end - timedelta(minutes=(n - i) * step_min)).isoformat()
+        for s in sensors:
+            rows.append({
+                "id": len(rows) + 1,
+                "sensor_id": s,
+                "location_name": f"Sensor {s}",
+                "lat": 44.2 + s / 100,
+                "lon": -76.5,
+                "ts_utc": ts,
+                "created_at": ts,
+                "average_db": round(50 + 5 * s + 8 * math.sin(i / 90), 2),
+                "max_db": 75.0,
+                "celsius": round(20 + s + 3 * math.sin(i / 200), 2),
+            })
+    return rows
+
+
+def latest_rows(rows):
+    latest = {}
+    for r in rows:
+        if r["sensor_id"] not in latest or r["ts_utc"] >= latest[r["sensor_id"]]["ts_utc"]:
+            latest[r["sensor_id"]] = r
+    return [latest[s] for s in sorted(latest)]
+
+
+@pytest.fixture
+def main_mod():
+    import main
+
+    yield main
+    main._AGG_CACHE.clear()
+    main._RESPONSE_CACHE.clear()
+    main._PRED_CACHE.clear()
+    main._PRED_CACHE_STATS.update(hits=0, misses=0)
+    main._dashboard_rpc_available = True
+
+
+@pytest.fixture
+def fake_db(main_mod, monkeypatch):
+    rows = make_rows()
+    db = FakeSupabase({main_mod.TABLE_NAME: rows, main_mod.LATEST_VIEW_NAME: latest_rows(rows)})
+    monkeypatch.setattr(main_mod, "supabase_async", db, raising=False)
+    return db
+
+
+@pytest.fixture
+def client(main_mod):
+    from fastapi.testclient import TestClient
+
+    # no `with`: the lifespan (real Supabase client, model warm-up) is not run
+    return TestClient(main_mod.app)
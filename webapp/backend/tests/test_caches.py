@@ -0,0 +1,62 @@
+from datetime import timedelta
+
+from conftest import ADMIN_KEY, NOW
+
+ADMIN = {"X-Admin-Key": ADMIN_KEY}
+
+
+def _history_reads(main_mod, db):
+    return [q for q in db.requests_to(main_mod.TABLE_NAME) if q.columns.startswith("ts_utc,")]
+
+
+def _predict(client, sensor_id=1):
+    future = (NOW + timedelta(minutes=30)).isoformat()
+    res = client.post("/ai/sensor-predict", json={"sensor_id": sensor_id, "metric": "celsius", "future_ts_utc": future})
+    assert res.status_code == 200, res.text
+    return res.json()
+
+
+def test_repeat_prediction_is_served_from_cache(main_mod, fake_db, client):
+    first = _predict(client)
+    second = _predict(client)
+
+    assert second == first
+    assert len(_history_reads(main_mod, fake_db)) == 1
+    stats = client.get("/metrics", headers=ADMIN).json()["predictions"]
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
+
+
+def test_flush_invalidates_the_prediction_cache(main_mod, fake_db, client):
+    _predict(client)
+
+    assert client.post("/admin/cache/flush", headers=ADMIN).status_code == 200
+    assert client.get("/metrics", headers=ADMIN).json()["predictions"]["size"] == 0
+
+    _predict(client)
+    assert len(_history_reads(main_mod, fake_db)) == 2
+
+
+def test_flush_invalidates_the_dashboard_caches(main_mod, fake_db, client):
+    def upstream():
+        return len(fake_db.requests)
+
+    assert client.get("/dashboard/noise").status_code == 200
+    after_first = upstream()
+    assert client.get("/dashboard/noise").status_code == 200
+    assert upstream() == after_first
+
+    client.post("/admin/cache/flush", headers=ADMIN)
+    sizes = client.get("/metrics", headers=ADMIN).json()
+    assert sizes["dashboard_aggregates"]["size"] == sizes["dashboard_responses"]["size"] == 0
+
+    assert client.get("/dashboard/noise").status_code == 200
+    assert upstream() > after_first
+
+
+def test_admin_routes_need_the_key(main_mod, fake_db, client):
+    _predict(client)
+
+    for headers in ({}, {"X-Admin-Key": "wrong"}):
+        assert client.post("/admin/cache/flush", headers=headers).status_code == 401
+        assert client.get("/metrics", headers=headers).status_code == 401
+    assert len(main_mod._PRED_CACHE) == 1
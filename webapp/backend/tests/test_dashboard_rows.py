@@ -0,0 +1,42 @@
+import asyncio
+import math
+from datetime import timedelta
+
+from conftest import NOW, FakeSupabase, make_rows
+
+
+def _fetch(main_mod, hours=2):
+    return asyncio.run(main_mod._fetch_rows_last_hours(hours, NOW))
+
+
+def test_keyset_pages_return_every_row_once_with_tied_timestamps(main_mod, monkeypatch):
+    # every timestamp is shared by both sensors and repeated per sensor
+    rows = [dict(r, id=2 * r["id"] - k) for r in make_rows(hours=3) for k in range(2)]
+    db = FakeSupabase({main_mod.TABLE_NAME: rows}, max_rows=7)
+    monkeypatch.setattr(main_mod, "supabase_async", db, raising=False)
+    monkeypatch.setattr(main_mod, "FETCH_PAGE_ROWS", 7)
+
+    got = _fetch(main_mod)
+
+    start = (NOW - timedelta(hours=2)).isoformat()
+    expected = sorted(r["id"] for r in rows if r["ts_utc"] >= start)
+    assert sorted(r["id"] for r in got) == expected
+    assert len(db.requests) == math.ceil((len(expected) + 1) / 7)
+
+
+def test_pages_are_plain_keyset_reads(main_mod, monkeypatch):
+    db = FakeSupabase({main_mod.TABLE_NAME: make_rows(hours=3)}, max_rows=50)
+    monkeypatch.setattr(main_mod, "supabase_async", db, raising=False)
+    monkeypatch.setattr(main_mod, "FETCH_PAGE_ROWS", 50)
+
+    _fetch(main_mod)
+
+    assert len(db.requests) > 1
+    assert all(q.offset == 0 and not q.count for q in db.requests)
+
+
+def test_short_window_is_one_request(main_mod, fake_db):
+    got = _fetch(main_mod, hours=1)
+
+    assert len(got) == 2 * 61
+    assert len(fake_db.requests) == 1
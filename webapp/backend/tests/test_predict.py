@@ -0,0 +1,75 @@
+import os
+from datetime import timedelta
+
+import numpy as np
+
+import predictor
+from conftest import NOW
+
+
+def _iso(minutes):
+    return (NOW + timedelta(minutes=minutes)).isoformat()
+
+
+def test_batch_reports_errors_per_item(main_mod, fake_db, client):
+    futures = [_iso(30), _iso(5000), _iso(-30)]  # ok, past the trained horizon, before the last reading
+    res = client.post(
+        "/ai/sensor-predict-batch",
+        json={"sensor_ids": [1, 2, 9, 1], "metric": "celsius", "future_ts_utc": futures},
+    )
+    assert res.status_code == 200, res.text
+    items = res.json()["predictions"]
+
+    # duplicate sensor ids are answered once; sensor 9 has no rows
+    assert [(i["sensor_id"], i["future_ts_utc"]) for i in items] == [(s, f) for s in (1, 2, 9) for f in futures]
+    by_key = {(i["sensor_id"], i["future_ts_utc"]): i for i in items}
+
+    for sid in (1, 2):
+        ok = by_key[(sid, futures[0])]
+        assert ok["error"] is None
+        single = client.post("/ai/sensor-predict", json={"sensor_id": sid, "metric": "celsius", "future_ts_utc": futures[0]})
+        assert ok["prediction"] == single.json()["prediction"]
+
+        assert by_key[(sid, futures[1])]["prediction"] is None
+        assert "exceeds trained hmax" in by_key[(sid, futures[1])]["error"]
+        assert by_key[(sid, futures[2])]["prediction"] is None
+        assert "must be after last data point" in by_key[(sid, futures[2])]["error"]
+
+    for f in futures:
+        assert by_key[(9, f)]["prediction"] is None
+        assert "No recent history found for sensor_id=9" in by_key[(9, f)]["error"]
+
+
+def test_batch_rejects_an_unknown_metric(fake_db, client):
+    res = client.post("/ai/sensor-predict-batch", json={"sensor_ids": [1], "metric": "max_db", "future_ts_utc": [_iso(30)]})
+    assert res.status_code == 422
+
+
+class _BoosterOnlyModel:
+    """An xgboost-like wrapper without the private helpers _fast_predict looks for."""
+
+    def get_booster(self):
+        raise AssertionError("the booster is only used for in-place predict")
+
+    def predict(self, X):
+        return np.full(len(X), 7.0)
+
+
+def test_fast_predict_falls_back_to_predict_without_xgboost_internals():
+    bundle = predictor.ModelBundle(target="celsius", feature_cols=["a"], model=_BoosterOnlyModel(), hmax_min=10, cadence_min=1)
+
+    assert predictor._fast_predict(bundle)(np.zeros((2, 1))).tolist() == [7.0, 7.0]
+
+
+def test_fast_predict_matches_the_model_on_a_real_bundle():
+    loaded = predictor.load_bundle_cached(os.environ["MODELS_DIR"], "celsius")
+    # a fresh bundle, so the memoized predict of the shared one is not touched
+    bundle = predictor.ModelBundle(
+        target=loaded.target, feature_cols=loaded.feature_cols, model=loaded.model,
+        hmax_min=loaded.hmax_min, cadence_min=loaded.cadence_min,
+    )
+    X = np.random.default_rng(0).normal(size=(5, len(bundle.feature_cols))).astype(np.float32)
+
+    fast = predictor._fast_predict(bundle)
+    assert fast is not bundle.model.predict
+    np.testing.assert_array_equal(fast(X), bundle.model.predict(X))
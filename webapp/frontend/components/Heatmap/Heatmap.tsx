@@ -200,6 +200,7 @@ type RangeResponse = {
 	time_column: string;
 	count: number;
 	by_sensor: Record<string, SensorRowApi[]>;
+	next_cursor: string | null;
 };
 
 function mapApiRow(r: SensorRowApi): SensorRow {
@@ -308,11 +309,31 @@ async function fetchRangeFrames(
 	for (const id of range(1, 5))
 		url.searchParams.append("sensor_ids", String(id));
 
-	const res = await fetch(url.toString());
-	if (!res.ok) throw new Error(`Range fetch failed: ${res.status}`);
+	// one PostgREST page; the backend never returns more per request
+	url.searchParams.set("limit", "1000");
+
+	// the backend pages by cursor; keep fetching until it stops returning one
+	let merged: RangeResponse | null = null;
+	let cursor: string | null = null;
+	do {
+		if (cursor) url.searchParams.set("cursor", cursor);
+
+		const res = await fetch(url.toString());
+		if (!res.ok) throw new Error(`Range fetch failed: ${res.status}`);
+
+		const page = (await res.json()) as RangeResponse;
+		if (!merged) {
+			merged = page;
+		} else {
+			for (const [sid, arr] of Object.entries(page.by_sensor ?? {})) {
+				(merged.by_sensor[sid] ??= []).push(...arr);
+			}
+			merged.count += page.count;
+		}
+		cursor = page.next_cursor ?? null;
+	} while (cursor);
 
-	const json = (await res.json()) as RangeResponse;
-	return rangeResponseToFrames(json, true);
+	return rangeResponseToFrames(merged!, true);
 }
 
 /** ---------- Component ---------- */
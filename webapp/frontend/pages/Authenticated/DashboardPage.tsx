@@ -85,30 +85,9 @@ type NoiseDashboardResponse = {
 	series_24h: SeriesPoint[];
 };
 
-type LatestRowApi = {
-	sensor_id: number;
-	location_name?: string | null;
-	lat?: number | null;
-	lon?: number | null;
-
-	ts_utc?: string | null;
-	created_at?: string | null;
-
-	average_db?: number | null;
-	max_db?: number | null;
-	celsius?: number | null;
-};
-
-type LatestResponse = { count: number; rows: LatestRowApi[] };
-
-type RangeRowApi = LatestRowApi;
-
-type RangeResponse = {
-	start: string;
-	end: string;
-	time_column: "ts_utc" | "created_at";
-	count: number;
-	by_sensor: Record<string, RangeRowApi[]>;
+type SummaryResponse = {
+	temperature: TempDashboardResponse;
+	noise: NoiseDashboardResponse;
 };
 
 const API_BASE = import.meta.env.VITE_API_BASE_URL ?? "http://127.0.0.1:8000";
@@ -119,11 +98,6 @@ const TORONTO_TZ = "America/Toronto";
 const HEAT_ELEVATED_C = 26.0;
 const HEAT_HIGH_C = 31.0;
 
-const NOISE_DAY_START_H = 7;
-const NOISE_NIGHT_START_H = 21;
-const NOISE_DAY_VIOLATION_DB = 65.0;
-const NOISE_NIGHT_VIOLATION_DB = 55.0;
-
 function formatTime(ms: number) {
 	return new Intl.DateTimeFormat(undefined, {
 		timeZone: TORONTO_TZ,
@@ -157,43 +131,6 @@ function fmtISOToLocal(iso: string | null) {
 	return new Date(ms).toLocaleString(undefined, { timeZone: TORONTO_TZ });
 }
 
-function mean(nums: number[]): number | null {
-	if (nums.length === 0) return null;
-	let s = 0;
-	for (const n of nums) s += n;
-	return s / nums.length;
-}
-
-function trendLabel(currMean: number | null, prevMean: number | null, eps = 0.15): TrendLabel {
-	if (currMean == null || prevMean == null) return "Unknown";
-	const delta = currMean - prevMean;
-	if (Math.abs(delta) <= eps) return "Stable";
-	return delta > 0 ? "Worsening" : "Improving";
-}
-
-function heatRiskLabel(tempC: number | null): "Normal" | "Elevated" | "High" | "Unknown" {
-	if (tempC == null) return "Unknown";
-	if (tempC >= HEAT_HIGH_C) return "High";
-	if (tempC >= HEAT_ELEVATED_C) return "Elevated";
-	return "Normal";
-}
-
-function getTorontoHour(d: Date): number {
-	const parts = new Intl.DateTimeFormat("en-CA", {
-		timeZone: TORONTO_TZ,
-		hour: "2-digit",
-		hour12: false,
-	}).formatToParts(d);
-	const hh = parts.find((p) => p.type === "hour")?.value ?? "0";
-	return Number(hh);
-}
-
-function currentNoiseThreshold(now: Date): number {
-	const h = getTorontoHour(now);
-	const isNight = h >= NOISE_NIGHT_START_H || h < NOISE_DAY_START_H;
-	return isNight ? NOISE_NIGHT_VIOLATION_DB : NOISE_DAY_VIOLATION_DB;
-}
-
 function Badge({ label }: { label: string }) {
 	const tone =
 		label === "High" || label === "Worsening"
@@ -222,284 +159,6 @@ function Card({ title, children }: { title: string; children: React.ReactNode })
 	);
 }
 
-type BuiltDashboard = {
-	temp: TempDashboardResponse;
-	noise: NoiseDashboardResponse;
-};
-
-function buildDashboardFromApi(latestRows: LatestRowApi[], range: RangeResponse, now: Date): BuiltDashboard {
-	const nowUtcIso = now.toISOString();
-	const nowLocalIso = new Date(now.getTime()).toLocaleString("sv-SE", { timeZone: TORONTO_TZ }).replace(" ", "T");
-
-	const noiseThrNow = currentNoiseThreshold(now);
-
-	// Index range rows by sensor with parsed ms
-	const rangeBySensorMs: Record<number, Array<{ ms: number; row: RangeRowApi }>> = {};
-	for (const [sidStr, rows] of Object.entries(range.by_sensor ?? {})) {
-		const sid = Number(sidStr);
-		const arr: Array<{ ms: number; row: RangeRowApi }> = [];
-		for (const r of rows ?? []) {
-			const ms = parseIsoAssumeUtcMs(r.ts_utc ?? r.created_at);
-			if (ms == null) continue;
-			arr.push({ ms, row: r });
-		}
-		arr.sort((a, b) => a.ms - b.ms);
-		rangeBySensorMs[sid] = arr;
-	}
-
-	const nowMs = now.getTime();
-	const start24Ms = nowMs - 24 * 60 * 60 * 1000;
-	const start48Ms = nowMs - 48 * 60 * 60 * 1000;
-
-	function windowMeanForSensor(sid: number, key: "celsius" | "average_db", a: number, b: number): number | null {
-		const arr = rangeBySensorMs[sid] ?? [];
-		const vals: number[] = [];
-		for (const it of arr) {
-			if (it.ms < a || it.ms > b) continue;
-			const v = it.row[key];
-			if (typeof v === "number") vals.push(v);
-		}
-		return mean(vals);
-	}
-
-	function cityWindowMean(key: "celsius" | "average_db", a: number, b: number): number | null {
-		const vals: number[] = [];
-		for (const it of Object.values(rangeBySensorMs)) {
-			for (const p of it) {
-				if (p.ms < a || p.ms > b) continue;
-				const v = p.row[key];
-				if (typeof v === "number") vals.push(v);
-			}
-		}
-		return mean(vals);
-	}
-
-	// City series 24h: bucket by hour (UTC epoch ms buckets)
-	function citySeries24h(key: "celsius" | "average_db"): SeriesPoint[] {
-		const bucketMs = 60 * 60 * 1000;
-
-		const buckets = new Map<number, number[]>();
-		for (const it of Object.values(rangeBySensorMs)) {
-			for (const p of it) {
-				if (p.ms < start24Ms || p.ms > nowMs) continue;
-				const v = p.row[key];
-				if (typeof v !== "number") continue;
-				const t0 = Math.floor(p.ms / bucketMs) * bucketMs;
-				let arr = buckets.get(t0);
-				if (!arr) {
-					arr = [];
-					buckets.set(t0, arr);
-				}
-				arr.push(v);
-			}
-		}
-
-		const out: SeriesPoint[] = [];
-		const startHour = Math.floor(start24Ms / bucketMs) * bucketMs;
-		const endHour = Math.floor(nowMs / bucketMs) * bucketMs;
-
-		for (let t = startHour; t <= endHour; t += bucketMs) {
-			const m = mean(buckets.get(t) ?? []);
-			out.push({ t, value: m });
-		}
-		return out;
-	}
-
-	// Heat risk series 24h: per hour, per sensor mean -> count sensors exceeding thresholds
-	function heatRiskSeries24h(): HeatRiskSeriesPoint[] {
-		const bucketMs = 60 * 60 * 1000;
-
-		// hour -> sensor -> temp vals
-		const hourMap = new Map<number, Map<number, number[]>>();
-		for (const [sid, arr] of Object.entries(rangeBySensorMs)) {
-			const sensorId = Number(sid);
-			for (const p of arr) {
-				if (p.ms < start24Ms || p.ms > nowMs) continue;
-				const v = p.row.celsius;
-				if (typeof v !== "number") continue;
-
-				const h0 = Math.floor(p.ms / bucketMs) * bucketMs;
-				let perSensor = hourMap.get(h0);
-				if (!perSensor) {
-					perSensor = new Map<number, number[]>();
-					hourMap.set(h0, perSensor);
-				}
-				let vals = perSensor.get(sensorId);
-				if (!vals) {
-					vals = [];
-					perSensor.set(sensorId, vals);
-				}
-				vals.push(v);
-			}
-		}
-
-		const out: HeatRiskSeriesPoint[] = [];
-		const startHour = Math.floor(start24Ms / bucketMs) * bucketMs;
-		const endHour = Math.floor(nowMs / bucketMs) * bucketMs;
-
-		for (let t = startHour; t <= endHour; t += bucketMs) {
-			const perSensor = hourMap.get(t) ?? new Map<number, number[]>();
-
-			let elevated = 0;
-			let high = 0;
-			let total = 0;
-
-			for (const vals of perSensor.values()) {
-				const m = mean(vals);
-				if (m == null) continue;
-				total += 1;
-				if (m >= HEAT_HIGH_C) high += 1;
-				else if (m >= HEAT_ELEVATED_C) elevated += 1;
-			}
-
-			out.push({ t, elevated, high, total });
-		}
-
-		return out;
-	}
-
-	// Build "now" from latest rows
-	const tempsNow: number[] = [];
-	let elevatedNow = 0;
-	let highNow = 0;
-	let totalTempNow = 0;
-
-	const noiseNowVals: Array<{ sid: number; db: number }> = [];
-
-	for (const r of latestRows) {
-		if (typeof r.celsius === "number") {
-			totalTempNow += 1;
-			tempsNow.push(r.celsius);
-			if (r.celsius >= HEAT_HIGH_C) highNow += 1;
-			else if (r.celsius >= HEAT_ELEVATED_C) elevatedNow += 1;
-		}
-		if (typeof r.average_db === "number") {
-			noiseNowVals.push({ sid: r.sensor_id, db: r.average_db });
-		}
-	}
-
-	const cityNowTemp = mean(tempsNow);
-	const cityNowRisk = heatRiskLabel(cityNowTemp);
-
-	// Trends (city 24h vs previous 24h)
-	const cityTempMean24 = cityWindowMean("celsius", start24Ms, nowMs);
-	const cityTempMeanPrev24 = cityWindowMean("celsius", start48Ms, start24Ms);
-	const cityTempTrend24 = trendLabel(cityTempMean24, cityTempMeanPrev24);
-
-	const cityNoiseMean24 = cityWindowMean("average_db", start24Ms, nowMs);
-	const cityNoiseMeanPrev24 = cityWindowMean("average_db", start48Ms, start24Ms);
-	const cityNoiseTrend24 = trendLabel(cityNoiseMean24, cityNoiseMeanPrev24);
-
-	// Per-sensor trend24h (last 24 vs prev 24)
-	function sensorTrend24h(sid: number, key: "celsius" | "average_db"): TrendLabel {
-		const m1 = windowMeanForSensor(sid, key, start24Ms, nowMs);
-		const m0 = windowMeanForSensor(sid, key, start48Ms, start24Ms);
-		return trendLabel(m1, m0);
-	}
-
-	const tempHotspots: TempHotspot[] = latestRows.map((r) => {
-		const temp = typeof r.celsius === "number" ? r.celsius : null;
-		const exceed = temp == null ? null : Math.max(0, temp - HEAT_ELEVATED_C);
-		const lastUpdate = r.ts_utc ?? r.created_at ?? null;
-
-		return {
-			sensor_id: r.sensor_id,
-			location_name: (r.location_name ?? `Sensor ${r.sensor_id}`) as string,
-			lat: (typeof r.lat === "number" ? r.lat : null) as number | null,
-			lon: (typeof r.lon === "number" ? r.lon : null) as number | null,
-			current_c: temp,
-			risk_label: heatRiskLabel(temp),
-			threshold_exceedance_c: exceed,
-			last_update_utc: lastUpdate,
-			trend_24h: sensorTrend24h(r.sensor_id, "celsius"),
-		};
-	});
-
-	const topTempHotspots = [...tempHotspots]
-		.sort((a, b) => {
-			const av = a.current_c;
-			const bv = b.current_c;
-			if (av == null && bv == null) return 0;
-			if (av == null) return 1;
-			if (bv == null) return -1;
-			return bv - av;
-		})
-		.slice(0, 5);
-
-	const noiseHotspots: NoiseHotspot[] = latestRows.map((r) => {
-		const db = typeof r.average_db === "number" ? r.average_db : null;
-		const exceed = db == null ? null : Math.max(0, db - noiseThrNow);
-		const isViolation = db == null ? false : db >= noiseThrNow;
-		const lastUpdate = r.ts_utc ?? r.created_at ?? null;
-
-		return {
-			sensor_id: r.sensor_id,
-			location_name: (r.location_name ?? `Sensor ${r.sensor_id}`) as string,
-			lat: (typeof r.lat === "number" ? r.lat : null) as number | null,
-			lon: (typeof r.lon === "number" ? r.lon : null) as number | null,
-			current_avg_db: db,
-			threshold_db: noiseThrNow,
-			threshold_exceedance_db: exceed,
-			is_violation_proxy: isViolation,
-			last_update_utc: lastUpdate,
-			trend_24h: sensorTrend24h(r.sensor_id, "average_db"),
-		};
-	});
-
-	const topNoiseHotspots = [...noiseHotspots]
-		.sort((a, b) => {
-			const av = a.current_avg_db;
-			const bv = b.current_avg_db;
-			if (av == null && bv == null) return 0;
-			if (av == null) return 1;
-			if (bv == null) return -1;
-			return bv - av;
-		})
-		.slice(0, 5);
-
-	const noiseViolations = noiseHotspots.filter((h) => h.is_violation_proxy);
-
-	const temp: TempDashboardResponse = {
-		now_utc: nowUtcIso,
-		thresholds: {
-			elevated_c: HEAT_ELEVATED_C,
-			high_c: HEAT_HIGH_C,
-			note: "Temp-only threshold (no humidity/humidex available).",
-		},
-		heat_risk: {
-			city_now: {
-				risk_label: cityNowRisk,
-				mean_c: cityNowTemp,
-				elevated_sensors: elevatedNow,
-				high_sensors: highNow,
-				total_reporting_sensors: totalTempNow,
-			},
-			series_24h: heatRiskSeries24h(),
-			note: "Counts use per-sensor hourly mean temperature.",
-		},
-		top_hotspots_now: topTempHotspots,
-		trend: { city_24h: cityTempTrend24 },
-		series_24h: citySeries24h("celsius"),
-	};
-
-	const noise: NoiseDashboardResponse = {
-		now_utc: nowUtcIso,
-		now_local: nowLocalIso,
-		thresholds: {
-			day_db: NOISE_DAY_VIOLATION_DB,
-			night_db: NOISE_NIGHT_VIOLATION_DB,
-			current_db: noiseThrNow,
-			note: "Threshold based on measured dBA + day/night; Kingston bylaw itself is activity/time-based.",
-		},
-		top_hotspots_now: topNoiseHotspots,
-		noise_violations: noiseViolations,
-		trend: { city_24h: cityNoiseTrend24 },
-		series_24h: citySeries24h("average_db"),
-	};
-
-	return { temp, noise };
-}
-
 export default function DashboardPage() {
 	const [temp, setTemp] = useState<TempDashboardResponse | null>(null);
 	const [noise, setNoise] = useState<NoiseDashboardResponse | null>(null);
@@ -510,28 +169,13 @@ export default function DashboardPage() {
 		setErr(null);
 		setLoading(true);
 		try {
-			const now = new Date();
-			const endISO = now.toISOString();
-			const start48ISO = new Date(now.getTime() - 48 * 60 * 60 * 1000).toISOString();
-
-			const [latestRes, rangeRes] = await Promise.all([
-				fetch(`${API_BASE}/sensor-data/latest`),
-				fetch(
-					`${API_BASE}/sensor-data/range?start=${encodeURIComponent(
-						start48ISO
-					)}&end=${encodeURIComponent(endISO)}&time_column=ts_utc`
-				),
-			]);
-
-			if (!latestRes.ok) throw new Error(`Latest failed: ${latestRes.status}`);
-			if (!rangeRes.ok) throw new Error(`Range failed: ${rangeRes.status}`);
-
-			const latestJson = (await latestRes.json()) as LatestResponse;
-			const rangeJson = (await rangeRes.json()) as RangeResponse;
-
-			const built = buildDashboardFromApi(latestJson.rows ?? [], rangeJson, now);
-			setTemp(built.temp);
-			setNoise(built.noise);
+			// one request: the backend builds both dashboards from a single 48h aggregate
+			const res = await fetch(`${API_BASE}/dashboard/summary`);
+			if (!res.ok) throw new Error(`Dashboard failed: ${res.status}`);
+
+			const summary = (await res.json()) as SummaryResponse;
+			setTemp(summary.temperature);
+			setNoise(summary.noise);
 		} catch (e: any) {
 			setErr(e?.message ?? "Failed to load dashboard");
 		} finally {